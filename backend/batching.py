@@ -0,0 +1,99 @@
+# backend/batching.py
+
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Max number of chat turns coalesced into one RAG batch
+MAX_BATCH = int(os.environ.get("MAX_BATCH", "16"))
+
+# Max time (ms) the first request of a batch waits for more requests
+MAX_WAIT_MS = int(os.environ.get("MAX_WAIT_MS", "50"))
+
+# Bounded queue: when full, new requests wait instead of piling up in memory
+MAX_QUEUE_SIZE = int(os.environ.get("MAX_QUEUE_SIZE", "256"))
+
+
+class BatchedRagService:
+    """
+    Micro-batcher in front of the RAG pipeline.
+
+    Each chat request is put on an asyncio.Queue together with a Future.
+    A background task pops up to MAX_BATCH items (or whatever arrived within
+    MAX_WAIT_MS of the first one), runs them through the batched RAG
+    entrypoint, and resolves each Future with its own answer (or error).
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Dict[str, Any]]], Awaitable[List[Any]]],
+        max_batch: int = MAX_BATCH,
+        max_wait_ms: int = MAX_WAIT_MS,
+        max_queue_size: int = MAX_QUEUE_SIZE,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self._worker: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background batching task (call from the app's event loop)."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background task and fail any request still queued."""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+        while not self.queue.empty():
+            _, future = self.queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("RAG batching service stopped."))
+
+    async def submit(self, **request: Any) -> Any:
+        """Queue one request and wait for its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((request, future))
+        return await future
+
+    async def _collect(self) -> List[tuple]:
+        """Wait for one item, then gather more until the batch is full or the window closes."""
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            requests = [req for req, _ in batch]
+            futures = [fut for _, fut in batch]
+
+            try:
+                results = await self.batch_fn(requests)
+            except Exception as e:
+                results = [e] * len(batch)
+
+            for future, result in zip(futures, results):
+                if future.done():
+                    # the waiting handler was cancelled (client went away)
+                    continue
+                if isinstance(result, BaseException):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
@@ -0,0 +1,72 @@
+# backend/load_shedding.py
+
+import os
+import time
+from collections import deque
+from typing import Optional
+
+# Timeout (s) used until enough latency samples are collected
+DEFAULT_TIMEOUT_S = float(os.environ.get("RAG_DEFAULT_TIMEOUT_S", "30"))
+
+# Lower bound (s) for the adaptive timeout, so a run of fast calls can never
+# push it below a normal LLM turn
+MIN_TIMEOUT_S = float(os.environ.get("RAG_MIN_TIMEOUT_S", "10"))
+
+# Calls faster than this (s) were answered from a cache (answer / retrieval)
+# without reaching the LLM; they are not used as latency samples
+LLM_SAMPLE_MIN_S = float(os.environ.get("RAG_LLM_SAMPLE_MIN_S", "0.5"))
+
+# Rolling window of recent calls used for the p99 and the timeout ratio
+BUDGET_WINDOW = int(os.environ.get("RAG_BUDGET_WINDOW", "200"))
+
+# Open the circuit when more than this share of recent calls timed out
+TIMEOUT_RATIO = float(os.environ.get("RAG_TIMEOUT_RATIO", "0.3"))
+
+# How long (s) the circuit stays open before calls are let through again
+OPEN_SECONDS = float(os.environ.get("RAG_CIRCUIT_OPEN_S", "10"))
+
+_MIN_SAMPLES = 50
+
+
+class AdaptiveBudget:
+    """
+    Adaptive timeout + circuit breaker for the RAG call.
+
+    - timeout(): 1.5x the rolling p99 latency of successful calls that
+      reached the LLM, at least MIN_TIMEOUT_S (DEFAULT_TIMEOUT_S until there
+      are enough samples)
+    - is_open(): True while the circuit is open; callers should fail fast
+      (503) instead of queueing more work behind slow calls
+    """
+
+    def __init__(self, window: int = BUDGET_WINDOW):
+        self.samples: deque = deque(maxlen=window)   # latencies of successful LLM calls
+        self.outcomes: deque = deque(maxlen=window)  # True = timed out
+        self.opened_at: Optional[float] = None
+
+    def timeout(self) -> float:
+        if len(self.samples) < _MIN_SAMPLES:
+            return DEFAULT_TIMEOUT_S
+        ordered = sorted(self.samples)
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        return max(p99 * 1.5, MIN_TIMEOUT_S)
+
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at < OPEN_SECONDS:
+            return True
+        # half-open: let traffic through again with a clean slate
+        self.opened_at = None
+        self.outcomes.clear()
+        return False
+
+    def record_success(self, elapsed: float) -> None:
+        if elapsed >= LLM_SAMPLE_MIN_S:
+            self.samples.append(elapsed)
+        self.outcomes.append(False)
+
+    def record_timeout(self) -> None:
+        self.outcomes.append(True)
+        if len(self.outcomes) >= _MIN_SAMPLES and sum(self.outcomes) / len(self.outcomes) > TIMEOUT_RATIO:
+            self.opened_at = time.monotonic()
@@ -1,42 +1,70 @@
 # backend/main.py
 
 import os
+import sys
+import time
+import asyncio
+import threading
 # Disable tokenizers parallelism to avoid fork deadlocks
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+import orjson
 from typing import List, Optional, Dict, Any
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import uuid 
-import json
-import traceback
+import importlib
+import queue
+import logging
+import logging.handlers
 #import redis 
 
 # IMPORTANT: Requires the updated Pydantic models from models.py
-from .models import ChatRequest, ChatResponse, Message 
+from .models import ChatRequest, ChatResponse, ChatResponseDelta, Message, MessageDict 
+from .batching import BatchedRagService
+from .load_shedding import AdaptiveBudget
+
+# Coalesce concurrent chat requests into batched RAG calls (off by default)
+BATCHING_ENABLED = os.environ.get("BATCHING_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# Unix socket of a separate rag_worker process (see rag_worker.py). When set,
+# this process only does HTTP/async I/O and forwards RAG calls to the worker.
+RAG_WORKER_SOCKET = os.environ.get("RAG_WORKER_SOCKET")
+rag_worker_client = None
 
 # --- RAG Pipeline Integration (V1 Architecture) ---
-try:
-    # --- CORRECTED IMPORT PATH ---
-    # We are importing the function 'ask_question' from the module 'rag_pipeline.rag_pipeline'
-    # from rag_pipeline.rag_pipeline import ask_question as rag_ask_question
-    from multi_turn_pipeline.rag_pipeline import ask_question as rag_ask_question
+# The RAG module (vectorstore, reranker, LLM client) is imported in the startup
+# hook, not at import time, so reload subprocesses and tooling that only import
+# the app don't pay for it. RAG_BACKEND picks the pipeline module; it must
+# expose ask_question(question, k, use_reranker, session_id).
+RAG_BACKEND = os.environ.get("RAG_BACKEND", "multi_turn_pipeline.rag_pipeline")
+rag = None
+RAG_SERVICE_READY = False
 
+if RAG_WORKER_SOCKET:
+    from rag_worker import RagWorkerClient
+
+    rag_worker_client = RagWorkerClient(RAG_WORKER_SOCKET)
     RAG_SERVICE_READY = True
-    print("FastAPI server initialized successfully with RAG Service.")
-    
-except ImportError as e:
-    # This error occurs if the path or file name is wrong
-    print(f"FATAL ERROR: Could not import 'rag_pipeline.rag_pipeline'. Check file structure and path. Error: {e}")
-    RAG_SERVICE_READY = False
-except Exception as e:
-    print(f"FATAL ERROR during RAG initialization: {e}")
-    RAG_SERVICE_READY = False
+    print(f"FastAPI server initialized, RAG calls go to the worker at {RAG_WORKER_SOCKET}.")
+
+
+# Request logging goes through a queue: the handler only enqueues the record
+# and the QueueListener thread does the formatting + stdout write.
+logger = logging.getLogger("rag.api")
+logger.setLevel(os.environ.get("LOG_LEVEL", "WARNING").upper())
+logger.propagate = False
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+_log_listener = logging.handlers.QueueListener(_log_queue, logging.StreamHandler())
+_log_listener.start()
 
 
 # Initialize FastAPI App
-app = FastAPI(title="Product RAG Chat API")
+# orjson serializes responses much faster than the stdlib json encoder
+app = FastAPI(title="Product RAG Chat API", default_response_class=ORJSONResponse)
 
 # Configure CORS (Accept all for development)
 app.add_middleware(
@@ -47,31 +75,131 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def _warmup_vectorstore():
+    """Load Chroma and run a dummy query so the HNSW index is loaded before the first user."""
+    vs = rag.build_or_load_vectorstore()
+    vs.similarity_search("warmup", k=1)
+
+
+def _warmup_reranker():
+    """Load the cross-encoder weights and run one forward pass."""
+    rag.get_bge_reranker().score("warmup", ["warmup"])
+
+
+@app.on_event("startup")
+async def _load_rag():
+    global rag, RAG_SERVICE_READY
+    if rag_worker_client is not None:
+        return
+    try:
+        rag = await asyncio.to_thread(importlib.import_module, RAG_BACKEND)
+        RAG_SERVICE_READY = True
+        print(f"FastAPI server initialized successfully with RAG Service ({RAG_BACKEND}).")
+    except ImportError as e:
+        # This error occurs if the path or file name is wrong
+        print(f"FATAL ERROR: Could not import '{RAG_BACKEND}'. Check file structure and path. Error: {e}")
+    except Exception as e:
+        print(f"FATAL ERROR during RAG initialization: {e}")
+
+
+@app.on_event("startup")
+async def _warm():
+    # the rag_worker process warms up its own models
+    if not RAG_SERVICE_READY or rag_worker_client is not None:
+        return
+    # A failed warm-up (no Chroma dir, model download error, vLLM down) must
+    # not stop the API from starting: the models are loaded lazily on the
+    # first request instead.
+    try:
+        await asyncio.to_thread(_warmup_vectorstore)
+        await asyncio.to_thread(rag.get_llm)
+        await asyncio.to_thread(_warmup_reranker)
+        print("RAG models and vectorstore pre-loaded.")
+    except Exception as e:
+        print(f"WARNING: RAG warm-up failed, models will be loaded on first request. Error: {e}")
+
+
+# Created on startup when BATCHING_ENABLED is set
+rag_batcher: Optional[BatchedRagService] = None
+
+
+@app.on_event("startup")
+async def _start_batcher():
+    global rag_batcher
+    if BATCHING_ENABLED and rag is not None and hasattr(rag, "ask_questions_batch"):
+        rag_batcher = BatchedRagService(rag.ask_questions_batch)
+        rag_batcher.start()
+        print("RAG request batching enabled.")
+
+
+@app.on_event("shutdown")
+async def _stop_batcher():
+    if rag_batcher is not None:
+        await rag_batcher.stop()
+
+
+@app.on_event("shutdown")
+async def _close_llm_client():
+    # The vLLM client (vector_pipeline / langgraph_app, VLLM_URL set) keeps
+    # pooled HTTP connections; only close it if that module was loaded.
+    llm_config = sys.modules.get("vector_pipeline.config")
+    if llm_config is not None:
+        await llm_config.aclose_hf_llm()
+
+
+@app.on_event("shutdown")
+async def _stop_log_listener():
+    # flushes queued log records
+    _log_listener.stop()
+
 
 # ----------------------------------------------------------------------
 # 2. API ENDPOINTS
 # ----------------------------------------------------------------------
 
+# /health only depends on RAG_SERVICE_READY, so both bodies are serialized once
+_HEALTH_BYTES = {
+    ready: orjson.dumps({"status": "healthy", "rag_service_ready": ready})
+    for ready in (True, False)
+}
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint to verify the API is running."""
-    return {
-        "status": "healthy",
-        "rag_service_ready": RAG_SERVICE_READY
-    }
+    return Response(content=_HEALTH_BYTES[RAG_SERVICE_READY], media_type="application/json")
+
+
+# Adaptive timeout + circuit breaker around the RAG call (per worker process)
+rag_budget = AdaptiveBudget()
+
 
-@app.post("/api/chat", response_model=ChatResponse)
+async def _call_rag(rag_kwargs: Dict[str, Any]) -> str:
+    # The RAG call is blocking, so it runs off the event loop: in the
+    # rag_worker process, through the micro-batcher, or in a worker thread.
+    if rag_worker_client is not None:
+        return await rag_worker_client.ask_question(**rag_kwargs)
+    if rag_batcher is not None:
+        return await rag_batcher.submit(**rag_kwargs)
+    return await asyncio.to_thread(rag.ask_question, **rag_kwargs)
+
+
+@app.post("/api/chat", response_model=ChatResponseDelta, response_model_exclude_unset=True)
 async def chat_handler(req: ChatRequest):
     """
     Handles incoming chat requests, routes them to the RAG pipeline,
-    and formats the response according to the ChatResponse model.
+    and formats the response according to the ChatResponseDelta model.
     """
     if not RAG_SERVICE_READY:
         raise HTTPException(status_code=503, detail="RAG Service is currently unavailable.")
+
+    # Shed load while recent calls keep timing out, instead of queueing more
+    if rag_budget.is_open():
+        raise HTTPException(status_code=503, detail="RAG Service is overloaded, please retry shortly.")
         
     try:
-        print(f"\n📥 Incoming request - session_id: {req.session_id}, user_id: {req.user_id}")
-        print(f"   Messages count: {len(req.messages)}")
+        logger.debug("Incoming request - session_id: %s, user_id: %s, messages: %d",
+                     req.session_id, req.user_id, len(req.messages))
         
         # Validate session_id - it must be provided
         if not req.session_id or not req.session_id.strip():
@@ -84,63 +212,193 @@ async def chat_handler(req: ChatRequest):
             
         # Get the content of the last message (the user's current query)
         user_query = req.messages[-1].content 
-        print(f"   User query: {user_query[:100]}...")
 
         # --- CRITICAL FIX: Calling rag_pipeline.ask_question with only the arguments it accepts ---
         # The rag_pipeline.py function accepts (question, k, use_reranker, session_id) and returns a string.
-        print(f"\n🔄 Calling ask_question with session_id={req.session_id}")
-        html_answer_string = rag_ask_question(
+        rag_kwargs = dict(
             question=user_query, 
             k=req.top_k, 
             use_reranker=req.use_reranker,
             session_id=req.session_id.strip()  # Ensure no whitespace
         )
+        # Bounded by the adaptive timeout. On timeout a thread-pool call keeps
+        # running in the background, but this request is answered right away.
+        started = time.monotonic()
+        html_answer_string = await asyncio.wait_for(_call_rag(rag_kwargs), timeout=rag_budget.timeout())
+        rag_budget.record_success(time.monotonic() - started)
         # ---------------------------------------------------------------------------------------
         
-        print(f"✅ Got answer from LLM (length: {len(html_answer_string)})")
+        logger.debug("Got answer from LLM (length: %d)", len(html_answer_string))
 
-        # 2. Format the string output into the expected ChatResponse model
+        # 2. Format the string output into the expected ChatResponseDelta model
 
-        # Create the assistant's message object
-        assistant_message = Message(role="assistant", content=html_answer_string)
-        
-        # Update the message history with the new assistant message
-        updated_messages = req.messages + [assistant_message]
+        # Create the assistant's message object. The full history lives on the
+        # server (chat history DB, keyed by session_id), so only this turn's
+        # message is sent back instead of re-serializing the whole session.
+        assistant_message: MessageDict = {"role": "assistant", "content": html_answer_string}
 
         # The V1 architecture does not return retrieved documents, so we pass an empty list
         retrieved_data = []
 
-        response = ChatResponse(
-            status="success",
-            session_id=req.session_id,
-            answer=html_answer_string, # The final answer string
-            messages=updated_messages,  # The complete, updated history
-            retrieved=retrieved_data    # Empty list for now
-        )
+        # Returned as a plain dict in an ORJSONResponse: this skips the
+        # response_model validation round-trip, ChatResponseDelta stays for OpenAPI docs.
+        payload = {
+            "status": "success",
+            "session_id": req.session_id,
+            "history_id": req.session_id.strip(),
+            "answer": html_answer_string, # The final answer string
+            "new_messages": [assistant_message],  # Only this turn's reply
+            "retrieved": retrieved_data    # Empty list for now
+        }
+        if req.include_history:
+            payload["messages"] = [*(m.model_dump() for m in req.messages), assistant_message]
+        response = ORJSONResponse(payload)
         
-        print(f"📤 Sending response with {len(updated_messages)} messages\n")
         return response
 
+    except asyncio.TimeoutError:
+        rag_budget.record_timeout()
+        logger.warning("RAG call timed out for session %s", req.session_id)
+        raise HTTPException(status_code=503, detail="RAG Service timed out, please retry shortly.")
+
     except ValueError as e:
         # Log the detailed error on the server side
-        print(f"\n❌ Validation Error: {e}")
-        print(f"   Traceback: {traceback.format_exc()}")
+        logger.warning("Validation error: %s", e, exc_info=True)
         
         # Return 400 Bad Request for validation errors
         raise HTTPException(status_code=400, detail=str(e))
         
     except Exception as e:
         # Log the detailed error on the server side
-        print(f"\n❌ Internal RAG Chat Error: {e}")
-        print(f"   Traceback: {traceback.format_exc()}")
+        logger.error("Internal RAG chat error: %s", e, exc_info=True)
         
         # Re-raise the exception as a 500 HTTP response with detailed error info
         raise HTTPException(status_code=500, detail=f"Unexpected error while generating response from RAG service: {str(e)}")
 
 
+def _sse(data: Dict[str, Any], event: Optional[str] = None) -> str:
+    """Format one Server-Sent Events frame."""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {orjson.dumps(data).decode()}\n\n"
+
+
+@app.post("/api/chat/stream")
+async def chat_stream_handler(req: ChatRequest):
+    """
+    Streaming version of /api/chat (Server-Sent Events).
+
+    - `data: {"t": "<token>"}` frames while the LLM generates the answer
+    - a final `event: done` frame with the ChatResponseDelta-shaped payload
+    - an `event: error` frame if the RAG pipeline fails mid-stream
+
+    /api/chat stays available as the buffered fallback.
+    """
+    if not RAG_SERVICE_READY:
+        raise HTTPException(status_code=503, detail="RAG Service is currently unavailable.")
+
+    # Same load shedding as /api/chat
+    if rag_budget.is_open():
+        raise HTTPException(status_code=503, detail="RAG Service is overloaded, please retry shortly.")
+
+    if not req.session_id or not req.session_id.strip():
+        raise HTTPException(status_code=400, detail="session_id is required and cannot be empty.")
+    if not req.messages:
+        raise HTTPException(status_code=400, detail="Messages list is empty.")
+    if rag_worker_client is None and not hasattr(rag, "ask_question_stream"):
+        raise HTTPException(status_code=501, detail=f"Streaming is not supported by {RAG_BACKEND}.")
+
+    rag_kwargs = dict(
+        question=req.messages[-1].content,
+        k=req.top_k,
+        use_reranker=req.use_reranker,
+        session_id=req.session_id.strip(),
+    )
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    # Set when the client goes away: the producer stops generating
+    cancelled = threading.Event()
+
+    def _produce():
+        # Runs the blocking generator in a worker thread and hands every
+        # token over to the event loop, until the stream is cancelled.
+        if rag_worker_client is not None:
+            # The worker RPC is request/response: send the answer as one frame
+            try:
+                answer = asyncio.run_coroutine_threadsafe(
+                    rag_worker_client.ask_question(**rag_kwargs), loop
+                ).result()
+                loop.call_soon_threadsafe(queue.put_nowait, ("done", answer))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+            return
+        gen = rag.ask_question_stream(**rag_kwargs)
+        try:
+            while not cancelled.is_set():
+                loop.call_soon_threadsafe(queue.put_nowait, ("token", next(gen)))
+            gen.close()  # stops the LLM generation
+        except StopIteration as stop:
+            loop.call_soon_threadsafe(queue.put_nowait, ("done", stop.value))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, ("error", e))
+
+    async def event_stream():
+        loop.run_in_executor(None, _produce)
+        try:
+            while True:
+                kind, value = await queue.get()
+                if kind == "token":
+                    yield _sse({"t": value})
+                elif kind == "done":
+                    assistant_message: MessageDict = {"role": "assistant", "content": value}
+                    payload = {
+                        "status": "success",
+                        "session_id": req.session_id,
+                        "history_id": rag_kwargs["session_id"],
+                        "answer": value,
+                        "new_messages": [assistant_message],
+                        "retrieved": [],
+                    }
+                    if req.include_history:
+                        payload["messages"] = [*(m.model_dump() for m in req.messages), assistant_message]
+                    yield _sse(payload, event="done")
+                    break
+                else:
+                    logger.error("Internal RAG stream error: %s", value, exc_info=value)
+                    yield _sse({"detail": f"Unexpected error while generating response from RAG service: {value}"}, event="error")
+                    break
+        finally:
+            # Not awaited: on disconnect the response closes right away and
+            # the producer exits at its next token
+            cancelled.set()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 # ----------------------------------------------------------------------
 # 3. RUNNER (For Local Development)
 # ----------------------------------------------------------------------
 
 if __name__ == "__main__":
-    uvicorn.run("backend.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # RELOAD=1 for the dev loop (single process); otherwise API_WORKERS workers
+    # (default: 1). Every worker imports the pipeline and warms up its own
+    # Chroma, reranker and LLM and writes the same SQLite history, so more
+    # than one worker is only allowed when the models live outside this
+    # process (RAG_WORKER_SOCKET or VLLM_URL set). With a separate rag_worker,
+    # pin both with taskset, e.g. `taskset -c 0-3` here and
+    # `taskset -c 4-11 python -m rag_worker`.
+    reload = os.environ.get("RELOAD", "0") == "1"
+    api_workers = int(os.environ.get("API_WORKERS", "1"))
+    if api_workers > 1 and not (RAG_WORKER_SOCKET or os.environ.get("VLLM_URL")):
+        print(f"API_WORKERS={api_workers} needs RAG_WORKER_SOCKET or VLLM_URL "
+              "(each worker would load its own models); starting 1 worker.")
+        api_workers = 1
+    uvicorn.run(
+        "backend.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        reload=reload,
+        workers=None if reload else api_workers,
+    )
\ No newline at end of file
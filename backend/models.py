@@ -1,18 +1,32 @@
 # backend/models.py
 
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from typing import Optional, List, Dict, Any, Literal, TypedDict
+from typing_extensions import Annotated
+
+Role = Literal["user", "assistant", "system"]
 
 # --- 1. Message Model (For history) ---
 class Message(BaseModel):
-    # 'user' or 'assistant'
-    role: str
+    # Literal roles validate as a plain membership check
+    model_config = ConfigDict(frozen=True, extra="ignore")
+
+    role: Role
+    content: str
+
+# Plain-dict form of a Message for internal use (e.g. building responses),
+# where the data is produced by us and needs no Pydantic validation.
+class MessageDict(TypedDict):
+    role: Role
     content: str
 
 # --- 2. Chat Request Model (Input from Frontend) ---
 class ChatRequest(BaseModel):
-    # Optional per their contract, but we still accept it for logging
-    session_id: str | None = None
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+
+    # Optional per their contract, but we still accept it for logging.
+    # Only the session id is stripped; message content is passed on as sent.
+    session_id: Annotated[str, StringConstraints(strip_whitespace=True)] | None = None
     user_id: str | None = None 
     
     # REQUIRED: They need the full history, not just the last message
@@ -22,6 +36,10 @@ class ChatRequest(BaseModel):
     top_k: int = 5
     use_reranker: bool = False
 
+    # Echo the full history (request messages + reply) back in `messages`.
+    # Off by default: the response only carries this turn's delta.
+    include_history: bool = False
+
 # --- 3. Response Models (Output from RAG team) ---
 
 # Structure for the metadata inside each retrieved chunk
@@ -30,7 +48,6 @@ class RetrievedMetadata(BaseModel):
     product_id: str | None = None
     product_name: str | None = None
     price: float | None = None
-    # Use Dict[str, Any] if the metadata keys are highly variable
     
 class RetrievedChunk(BaseModel):
     metadata: RetrievedMetadata
@@ -42,6 +59,17 @@ class ChatResponse(BaseModel):
     session_id: str | None = None
     answer: str                         # The final text response
     messages: list[Message]             # The complete, updated chat history
-    retrieved: list[RetrievedChunk]     # The source documents (product chunks)
+    retrieved: list[RetrievedChunk] = Field(default_factory=list)  # The source documents (product chunks)
 
-    
\ No newline at end of file
+# --- 5. Delta Chat Response (Output to Frontend) ---
+# Only the messages produced in this turn are returned; the full history
+# stays on the server (keyed by `history_id`) and the frontend appends
+# `new_messages` to what it already displays.
+class ChatResponseDelta(BaseModel):
+    status: str = "success"
+    session_id: str | None = None
+    history_id: str | None = None       # Server-side history key (the session id)
+    answer: str                         # The final text response
+    new_messages: list[Message]         # Messages added in this turn (the assistant reply)
+    retrieved: list[RetrievedChunk] = Field(default_factory=list)  # The source documents (product chunks)
+    messages: list[Message] | None = None  # Full updated history, only with include_history
@@ -1,5 +1,20 @@
 # langgraph_app/__init__.py
 
-from .graph import get_app, run_chat_session, run_chat_stateless
+from .graph import (
+    get_app,
+    run_chat_session,
+    run_chat_stateless,
+    arun_chat_session,
+    arun_chat_stateless,
+)
+from .config import open_checkpointer, close_checkpointer
 
-__all__ = ["get_app", "run_chat_session", "run_chat_stateless"]
+__all__ = [
+    "get_app",
+    "run_chat_session",
+    "run_chat_stateless",
+    "arun_chat_session",
+    "arun_chat_stateless",
+    "open_checkpointer",
+    "close_checkpointer",
+]
@@ -3,35 +3,116 @@
 """
 Helpers for the LangGraph layer to get:
 - the shared Chroma vectorstore
-- the shared Hugging Face LLM
+- the shared LLM (in-process Hugging Face pipeline, or a vLLM / TGI
+  server over HTTP when VLLM_URL is set)
+- a persistent async checkpointer (Redis or SQLite) for chat memory
 """
 
+import os
+import threading
+from pathlib import Path
 from typing import Optional
 
 from langchain_chroma import Chroma
 
 from vector_pipeline.ingestion import build_or_load_vectorstore
-from vector_pipeline.config import get_hf_llm as _get_hf_llm
+from vector_pipeline.config import VLLMClient, get_hf_llm as _get_hf_llm
 
 
 _vectorstore: Optional[Chroma] = None
+_vectorstore_lock = threading.Lock()
 
 
 def get_vectorstore() -> Chroma:
     """
     Singleton Chroma vectorstore.
 
-    First call: build/load from disk via vector_pipeline.ingestion.
+    First call: build/load from disk via vector_pipeline.ingestion
+    (under a lock, so concurrent first calls load it only once).
     Later calls: reuse same instance.
     """
     global _vectorstore
     if _vectorstore is None:
-        _vectorstore = build_or_load_vectorstore()
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                _vectorstore = build_or_load_vectorstore()
     return _vectorstore
 
 
+# ---------------- LLM ----------------
+
 def get_llm():
     """
-    Singleton HF LLM (TinyLlama in your current settings.py).
+    Singleton LLM, shared with vector_pipeline (`vector_pipeline.config.get_hf_llm`).
+
+    - VLLM_URL set → VLLMClient talking to the vLLM / TGI server
+    - otherwise    → in-process HF pipeline (model from settings.py)
     """
     return _get_hf_llm()
+
+
+def _reset_singletons() -> None:
+    # forked children load their own vectorstore / LLM client
+    global _vectorstore, _vectorstore_lock
+    _vectorstore = None
+    _vectorstore_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_singletons)
+
+
+# ---------------- Persistent checkpointer (chat memory) ----------------
+
+# Redis for multi-worker / multi-host deploys; SQLite file otherwise.
+REDIS_URL = os.environ.get("REDIS_URL")
+CHECKPOINT_DB_PATH = Path(__file__).resolve().parent.parent / "langgraph_checkpoints.db"
+
+# Redis only: expire idle threads after this many minutes (bounded memory)
+CHECKPOINT_TTL_MINUTES = int(os.environ.get("CHECKPOINT_TTL_MINUTES", "1440"))
+
+_checkpointer_cm = None
+_checkpointer = None
+
+
+async def open_checkpointer():
+    """
+    Open the async checkpointer once, on the running event loop
+    (e.g. in FastAPI startup), and return it.
+
+    - REDIS_URL set → AsyncRedisSaver (shared across workers, TTL per thread)
+    - otherwise     → AsyncSqliteSaver on CHECKPOINT_DB_PATH
+    """
+    global _checkpointer_cm, _checkpointer
+
+    if REDIS_URL:
+        from langgraph.checkpoint.redis.aio import AsyncRedisSaver
+
+        _checkpointer_cm = AsyncRedisSaver.from_conn_string(
+            REDIS_URL,
+            ttl={"default_ttl": CHECKPOINT_TTL_MINUTES, "refresh_on_read": True},
+        )
+    else:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+        _checkpointer_cm = AsyncSqliteSaver.from_conn_string(str(CHECKPOINT_DB_PATH))
+
+    saver = await _checkpointer_cm.__aenter__()
+    if hasattr(saver, "asetup"):
+        await saver.asetup()
+    _checkpointer = saver
+    return saver
+
+
+async def close_checkpointer() -> None:
+    """Close the checkpointer opened by `open_checkpointer()` (e.g. on shutdown)."""
+    global _checkpointer_cm, _checkpointer
+    if _checkpointer is not None:
+        # the compiled graph holds the saver; drop it so it isn't reused
+        from .graph import drop_app
+
+        drop_app(_checkpointer)
+        _checkpointer = None
+    if _checkpointer_cm is not None:
+        await _checkpointer_cm.__aexit__(None, None, None)
+        _checkpointer_cm = None
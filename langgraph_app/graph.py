@@ -6,10 +6,13 @@ LangGraph app for your product RAG chatbot.
 Flow:
     START -> agent_node -> END
 
-We compile it with an InMemorySaver checkpointer, so history is stored
-per `thread_id` that the backend passes in the config.
+By default we compile it with an InMemorySaver checkpointer, so history
+is stored per `thread_id` that the backend passes in the config. For
+multi-worker deploys, pass a persistent async checkpointer (see
+`langgraph_app.config.open_checkpointer`) to `get_app` / `arun_chat_session`.
 """
 
+import weakref
 from typing import Any, Dict, List
 
 from typing_extensions import Literal
@@ -20,36 +23,50 @@ from langchain_core.messages import (
     AIMessage,
     SystemMessage,
 )
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
 from .state import ChatState
-from .nodes import agent_node
+from .nodes import agent_node, aagent_node
 
 
 # ----------------- Build & cache the graph --------------------
 
 
-_app = None
-_memory = MemorySaver()  # per-thread chat history
+# compiled graph per checkpointer, keyed on the saver itself (not id(), which
+# can be reused by a new saver once a closed one is garbage collected)
+_apps: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+_memory = MemorySaver()  # per-thread chat history (single process only)
 
 
-def get_app():
+def get_app(checkpointer: Any = None):
     """
     Return a compiled LangGraph app with memory.
+
+    `checkpointer` defaults to the in-process MemorySaver; pass e.g. an
+    AsyncRedisSaver / AsyncSqliteSaver to share history across workers.
     """
-    global _app
-    if _app is not None:
-        return _app
+    saver = checkpointer if checkpointer is not None else _memory
+    app = _apps.get(saver)
+    if app is not None:
+        return app
 
     workflow = StateGraph(ChatState)
 
-    workflow.add_node("agent", agent_node)
+    # sync version for app.invoke, async version for app.ainvoke
+    workflow.add_node("agent", RunnableLambda(agent_node, afunc=aagent_node, name="agent"))
     workflow.set_entry_point("agent")
     workflow.add_edge("agent", END)
 
-    _app = workflow.compile(checkpointer=_memory)
-    return _app
+    app = workflow.compile(checkpointer=saver)
+    _apps[saver] = app
+    return app
+
+
+def drop_app(checkpointer: Any) -> None:
+    """Forget the graph compiled for `checkpointer` (call when closing it)."""
+    _apps.pop(checkpointer, None)
 
 
 # -------------- Helpers: dict <-> LC messages ------------------
@@ -112,17 +129,43 @@ def run_chat_session(
         }
     """
     app = get_app()
+    state_in, config = _session_input(user_message, session_id)
+
+    state_out: ChatState = app.invoke(state_in, config=config)
+
+    return _state_to_result(state_out)
+
+
+async def arun_chat_session(
+    user_message: str,
+    session_id: str,
+    checkpointer: Any = None,
+) -> Dict[str, Any]:
+    """
+    Async version of `run_chat_session` (uses `app.ainvoke`).
+
+    Pass the checkpointer opened at startup with
+    `langgraph_app.config.open_checkpointer()` so the history is shared
+    across workers and checkpoint I/O does not block the event loop.
+    """
+    app = get_app(checkpointer)
+    state_in, config = _session_input(user_message, session_id)
+
+    state_out: ChatState = await app.ainvoke(state_in, config=config)
+
+    return _state_to_result(state_out)
 
-    # New input for this turn
+
+def _session_input(user_message: str, session_id: str):
+    # New input for this turn; last_retrieved will be set by the node
     state_in: Dict[str, Any] = {
         "messages": [HumanMessage(content=user_message)]
-        # last_retrieved will be set by the node
     }
-
     config = {"configurable": {"thread_id": session_id}}
+    return state_in, config
 
-    state_out: ChatState = app.invoke(state_in, config=config)
 
+def _state_to_result(state_out: ChatState) -> Dict[str, Any]:
     lc_messages = state_out["messages"]
     retrieved = state_out.get("last_retrieved", [])
 
@@ -152,14 +195,18 @@ def run_chat_stateless(
 
     state_out: ChatState = app.invoke(state_in)
 
-    lc_messages_out = state_out["messages"]
-    retrieved = state_out.get("last_retrieved", [])
+    return _state_to_result(state_out)
 
-    messages_out = [_lc_message_to_dict(m) for m in lc_messages_out]
-    answer = messages_out[-1]["content"] if messages_out else ""
 
-    return {
-        "answer": answer,
-        "messages": messages_out,
-        "retrieved": retrieved,
-    }
+async def arun_chat_stateless(
+    messages: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """Async version of `run_chat_stateless` (uses `app.ainvoke`)."""
+    app = get_app()
+
+    lc_messages = [_dict_to_lc_message(m) for m in messages]
+    state_in: Dict[str, Any] = {"messages": lc_messages}
+
+    state_out: ChatState = await app.ainvoke(state_in)
+
+    return _state_to_result(state_out)
@@ -10,6 +10,8 @@ We use a single `agent_node` that:
   4. Appends the assistant answer and stores retrieved chunks.
 """
 
+import asyncio
+from string import Template
 from typing import Any, Dict, List
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
@@ -19,31 +21,51 @@ from .state import ChatState
 from .config import get_vectorstore, get_llm
 
 
+# Prompt + context separator are built once at import, not on every turn.
+_SEP = "\n\n---\n\n"
+
+_PROMPT_TMPL = Template(
+    """Use ONLY the following product information to answer the question.
+If the answer is not in the context, say you don't know.
+
+CONTEXT:
+$ctx
+
+QUESTION:
+$q
+
+ANSWER:"""
+)
+
+# Max characters of each chunk returned to the UI as a snippet
+_SNIPPET_LEN = 400
+
+_NOTHING_FOUND = "I couldn't find anything relevant in the product database."
+
+
 def _get_last_user_message(messages: List[BaseMessage]) -> HumanMessage:
     """
     Return the last HumanMessage in the list.
 
-    We scan backwards to be safe; if none is found, we error.
+    The new user turn is normally the tail of the list, so check that
+    first; otherwise scan backwards to be safe. If none is found, we error.
     """
+    if messages and isinstance(messages[-1], HumanMessage):
+        return messages[-1]
+
     for msg in reversed(messages):
         if isinstance(msg, HumanMessage):
             return msg
     raise ValueError("No HumanMessage found in state.messages.")
 
 
-def agent_node(state: ChatState) -> ChatState:
+def _prepare_turn(state: ChatState):
     """
-    Core RAG agent node.
-
-    Reads:
-      - state["messages"]  (full history)
+    Retrieve docs for the latest user message and build the prompt.
 
-    Writes:
-      - appends an AIMessage with the answer to `messages`
-      - overwrites `last_retrieved` with the chunks for this turn
+    Returns (prompt, retrieved); prompt is None if nothing was found.
     """
     vs = get_vectorstore()
-    llm = get_llm()
 
     last_user = _get_last_user_message(state["messages"])
     query = last_user.content
@@ -57,36 +79,24 @@ def agent_node(state: ChatState) -> ChatState:
     )
 
     if not docs:
-        answer_text = "I couldn't find anything relevant in the product database."
-        retrieved: List[Dict[str, Any]] = []
-    else:
-        # Prepare retrieved chunks for UI + context
-        retrieved = [
-            {
-                "metadata": doc.metadata,
-                "snippet": doc.page_content[:400],
-            }
-            for doc in docs
-        ]
-
-        context = "\n\n---\n\n".join(doc.page_content for doc in docs)
-
-        prompt = f"""
-Use ONLY the following product information to answer the question.
-If the answer is not in the context, say you don't know.
+        return None, []
 
-CONTEXT:
-{context}
+    # Prepare retrieved chunks for UI + context
+    retrieved = [
+        {
+            "metadata": doc.metadata,
+            "snippet": doc.page_content[:_SNIPPET_LEN],
+        }
+        for doc in docs
+    ]
 
-QUESTION:
-{query}
+    context = _SEP.join(doc.page_content for doc in docs)
 
-ANSWER:
-""".strip()
+    prompt = _PROMPT_TMPL.substitute(ctx=context, q=query)
+    return prompt, retrieved
 
-        # HuggingFacePipeline.invoke usually returns a string
-        answer_text = llm.invoke(prompt)
 
+def _node_output(answer_text: str, retrieved: List[Dict[str, Any]]) -> ChatState:
     ai_msg = AIMessage(content=answer_text)
 
     # Because of `add_messages`, returning `{"messages": [ai_msg]}`
@@ -95,3 +105,50 @@ ANSWER:
         "messages": [ai_msg],
         "last_retrieved": retrieved,
     }
+
+
+def agent_node(state: ChatState) -> ChatState:
+    """
+    Core RAG agent node.
+
+    Reads:
+      - state["messages"]  (full history)
+
+    Writes:
+      - appends an AIMessage with the answer to `messages`
+      - overwrites `last_retrieved` with the chunks for this turn
+    """
+    prompt, retrieved = _prepare_turn(state)
+    if prompt is None:
+        return _node_output(_NOTHING_FOUND, [])
+
+    # Stream the generation (HuggingFacePipeline uses a TextIteratorStreamer
+    # under the hood), so callers running the graph with
+    # `stream_mode="messages"` receive tokens as they are produced.
+    llm = get_llm()
+    answer_text = "".join(
+        getattr(chunk, "content", chunk) for chunk in llm.stream(prompt)
+    )
+    return _node_output(answer_text, retrieved)
+
+
+async def aagent_node(state: ChatState) -> ChatState:
+    """
+    Async version of `agent_node`, used by `app.ainvoke`.
+
+    Retrieval + prompt building run in a worker thread, concurrently with
+    resolving the LLM (the first call loads the model). The LLM call is
+    awaited, so with a vLLM server (VLLM_URL) many turns can generate
+    concurrently.
+    """
+    (prompt, retrieved), llm = await asyncio.gather(
+        asyncio.to_thread(_prepare_turn, state),
+        asyncio.to_thread(get_llm),
+    )
+    if prompt is None:
+        return _node_output(_NOTHING_FOUND, [])
+
+    parts: List[str] = []
+    async for chunk in llm.astream(prompt):
+        parts.append(getattr(chunk, "content", chunk))
+    return _node_output("".join(parts), retrieved)
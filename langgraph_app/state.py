@@ -3,21 +3,45 @@
 from typing import Any, Dict, List
 from typing_extensions import Annotated, TypedDict
 
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph import add_messages
 
+# Max number of turns (user message + assistant reply) kept in the graph
+# state (older ones are dropped)
+MAX_CTX_TURNS = 10
+
+
+def add_messages_bounded(old: List[BaseMessage], new: List[BaseMessage]) -> List[BaseMessage]:
+    """
+    Same as `add_messages`, but keep only the last MAX_CTX_TURNS turns
+    (2 * MAX_CTX_TURNS messages) so the state (and each checkpoint write)
+    does not grow with the session.
+
+    The cut is moved forward to the first user message in the window, so
+    the kept history never starts with an assistant reply.
+    """
+    merged = add_messages(old, new)
+    window = merged[-2 * MAX_CTX_TURNS:]
+    if len(window) == len(merged):
+        return merged
+    for i, message in enumerate(window):
+        if isinstance(message, HumanMessage):
+            return window[i:]
+    return window
+
 
 class ChatState(TypedDict):
     """
     State that flows through the LangGraph.
 
-    - messages: full chat history as LangChain messages
+    - messages: recent chat history as LangChain messages
                 (HumanMessage / AIMessage / SystemMessage).
-      `Annotated[..., add_messages]` means new messages returned by
-      nodes will be *appended* instead of replacing the list.
+      `Annotated[..., add_messages_bounded]` means new messages returned by
+      nodes will be *appended* instead of replacing the list, keeping only
+      the last MAX_CTX_TURNS turns.
 
     - last_retrieved: list of retrieved chunks for the latest user turn,
       each as {"metadata": {...}, "snippet": "..."}.
     """
-    messages: Annotated[List[BaseMessage], add_messages]
+    messages: Annotated[List[BaseMessage], add_messages_bounded]
     last_retrieved: List[Dict[str, Any]]
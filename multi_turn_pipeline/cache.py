@@ -0,0 +1,255 @@
+"""
+Response + retrieval cache in front of the RAG pipeline.
+
+Two tiers:
+- in-process LRU, keyed by the exact normalized question (+ k, use_reranker)
+- Redis (only if REDIS_URL is set), keyed by the exact question and by a
+  locality-sensitive hash of the question embedding, so paraphrases of an
+  already answered question can be served without retrieval or LLM call.
+
+Keys are built from the *standalone* question (after the follow-up rewrite),
+so a cached answer never depends on a particular session's history.
+"""
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from .settings import (
+    REDIS_URL,
+    REDIS_CACHE_TTL,
+    LOCAL_CACHE_SIZE,
+    SEMANTIC_CACHE_THRESHOLD,
+)
+
+# Number of random hyperplanes used for the semantic (LSH) bucket
+_LSH_BITS = 16
+# Max entries kept per semantic bucket
+_BUCKET_SIZE = 8
+
+# Hit/miss counters, e.g. for logging or a metrics endpoint
+CACHE_STATS: Dict[str, int] = {
+    "answer_hits": 0,
+    "semantic_hits": 0,
+    "answer_misses": 0,
+    "retrieval_hits": 0,
+    "retrieval_misses": 0,
+}
+_stats_lock = threading.Lock()
+
+
+def _count(stat: str) -> None:
+    # lookups run in worker threads concurrently
+    with _stats_lock:
+        CACHE_STATS[stat] += 1
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and lowercase, so trivial variations share a key."""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def _exact_key(prefix: str, query: str, k: int, use_reranker: bool) -> str:
+    raw = f"{normalize_query(query)}|{k}|{use_reranker}"
+    return f"rag:{prefix}:" + hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class _LRU:
+    """Small thread-safe LRU dict (the pipeline runs in worker threads)."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_local = _LRU(LOCAL_CACHE_SIZE)
+
+_redis = None
+_redis_failed = False
+_planes: Optional[np.ndarray] = None
+
+
+def _get_redis():
+    """Return a Redis client, or None if REDIS_URL is unset / unreachable."""
+    global _redis, _redis_failed
+    if _redis is not None or _redis_failed or not REDIS_URL:
+        return _redis
+    try:
+        import redis
+
+        client = redis.Redis.from_url(REDIS_URL)
+        client.ping()
+        _redis = client
+        print(f"Response cache connected to Redis at {REDIS_URL}")
+    except Exception as e:
+        print(f"Redis cache disabled, could not connect: {e}")
+        _redis_failed = True
+    return _redis
+
+
+def _quantize(embedding: List[float]) -> np.ndarray:
+    """Quantize a (normalized) embedding to int8."""
+    return np.clip(np.round(np.asarray(embedding, dtype=np.float32) * 127), -127, 127).astype(np.int8)
+
+
+def _semantic_key(q_vec: np.ndarray, k: int, use_reranker: bool) -> str:
+    global _planes
+    if _planes is None or _planes.shape[1] != q_vec.shape[0]:
+        # fixed seed: every worker process must get the same buckets
+        _planes = np.random.default_rng(0).standard_normal((_LSH_BITS, q_vec.shape[0]))
+    bits = (_planes @ q_vec.astype(np.float32)) > 0
+    bucket = int(np.packbits(bits).view(">u2")[0])
+    return f"rag:sem:{k}:{int(use_reranker)}:{bucket}"
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(a @ b) / denom if denom else 0.0
+
+
+# ---------------------------------------------------------------------------
+# Answer cache
+# ---------------------------------------------------------------------------
+
+def get_cached_answer(
+    question: str,
+    k: int,
+    use_reranker: bool,
+    embed_fn: Optional[Callable[[str], List[float]]] = None,
+) -> Optional[str]:
+    """
+    Look up a cached raw LLM answer for `question`.
+
+    Order: in-process exact match, Redis exact match, Redis semantic match
+    (only if `embed_fn` is given). Returns None on a miss.
+    """
+    key = _exact_key("answer", question, k, use_reranker)
+
+    answer = _local.get(key)
+    if answer is not None:
+        _count("answer_hits")
+        return answer
+
+    client = _get_redis()
+    if client is not None:
+        try:
+            raw = client.get(key)
+            if raw is not None:
+                answer = raw.decode("utf-8")
+                _local.set(key, answer)
+                _count("answer_hits")
+                return answer
+
+            if embed_fn is not None:
+                q_vec = _quantize(embed_fn(question))
+                for entry in client.lrange(_semantic_key(q_vec, k, use_reranker), 0, -1):
+                    item = json.loads(entry)
+                    if _cosine(q_vec, np.asarray(item["e"], dtype=np.int8)) >= SEMANTIC_CACHE_THRESHOLD:
+                        _count("semantic_hits")
+                        return item["a"]
+        except Exception as e:
+            print(f"Redis cache lookup failed: {e}")
+
+    _count("answer_misses")
+    return None
+
+
+def set_cached_answer(
+    question: str,
+    k: int,
+    use_reranker: bool,
+    answer: str,
+    embed_fn: Optional[Callable[[str], List[float]]] = None,
+) -> None:
+    """Store a raw LLM answer in all cache tiers."""
+    key = _exact_key("answer", question, k, use_reranker)
+    _local.set(key, answer)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        client.set(key, answer, ex=REDIS_CACHE_TTL)
+        if embed_fn is not None:
+            q_vec = _quantize(embed_fn(question))
+            sem_key = _semantic_key(q_vec, k, use_reranker)
+            entry = json.dumps({"e": q_vec.tolist(), "a": answer})
+            pipe = client.pipeline()
+            pipe.lpush(sem_key, entry)
+            pipe.ltrim(sem_key, 0, _BUCKET_SIZE - 1)
+            pipe.expire(sem_key, REDIS_CACHE_TTL)
+            pipe.execute()
+    except Exception as e:
+        print(f"Redis cache write failed: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Retrieval cache (LLM miss can still skip the vector search + reranker)
+# ---------------------------------------------------------------------------
+
+def get_cached_docs(question: str, k: int, use_reranker: bool) -> Optional[List[Document]]:
+    """Return the cached retrieval result for `question`, or None."""
+    key = _exact_key("docs", question, k, use_reranker)
+
+    docs = _local.get(key)
+    if docs is not None:
+        _count("retrieval_hits")
+        return docs
+
+    client = _get_redis()
+    if client is not None:
+        try:
+            raw = client.get(key)
+            if raw is not None:
+                docs = [
+                    Document(page_content=d["page_content"], metadata=d["metadata"])
+                    for d in json.loads(raw)
+                ]
+                _local.set(key, docs)
+                _count("retrieval_hits")
+                return docs
+        except Exception as e:
+            print(f"Redis cache lookup failed: {e}")
+
+    _count("retrieval_misses")
+    return None
+
+
+def set_cached_docs(question: str, k: int, use_reranker: bool, docs: List[Document]) -> None:
+    """Store a retrieval result in all cache tiers."""
+    key = _exact_key("docs", question, k, use_reranker)
+    _local.set(key, docs)
+
+    client = _get_redis()
+    if client is None:
+        return
+    try:
+        payload = json.dumps(
+            [{"page_content": d.page_content, "metadata": d.metadata} for d in docs],
+            default=str,
+        )
+        client.set(key, payload, ex=REDIS_CACHE_TTL)
+    except Exception as e:
+        print(f"Redis cache write failed: {e}")
@@ -1,13 +1,14 @@
 import os
 import re
+import asyncio
 import markdown
 import torch
 import shutil
-from typing import Any, Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
 from dotenv import load_dotenv
 from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
     AutoModelForCausalLM,
     pipeline,
 )
@@ -21,13 +22,17 @@ from langchain_core.runnables import RunnableParallel, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document
 
+from vector_pipeline.config import CrossEncoderReranker, get_bge_reranker, get_device
+from vector_pipeline._topk_numba import topk
+from vector_pipeline.ingestion import document_count, unpack_chroma_archive
+from vector_pipeline.retrieval import retrieve_documents_batch
+
 from .history_db import get_user_session, save_chat_history
+from .cache import get_cached_answer, set_cached_answer, get_cached_docs, set_cached_docs
 from .settings import (CHROMA_DIR, 
-                       CHROMA_ARCHIVE,
                        OPENROUTER_API_KEY_PATH, 
                        CLOUD_LLM_MODEL_NAME, 
-                       EMBEDDING_MODEL_NAME,
-                       RERANKER_MODEL_NAME
+                       EMBEDDING_MODEL_NAME
                        )
 
 
@@ -35,79 +40,9 @@ from .settings import (CHROMA_DIR,
 # Cross-encoder reranker
 # ---------------------------------------------------------------------------
 
-class CrossEncoderReranker:
-    """
-    Simple cross-encoder reranker wrapper using HF Transformers.
-    """
-
-    def __init__(self, model_name: str = RERANKER_MODEL_NAME, device: Optional[str] = None):
-        self.model_name = model_name
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        self.model.to(self.device)
-        self.model.eval()
-
-    def score(self, query: str, docs: List[str], batch_size: int = 16) -> List[float]:
-        """
-        Return a list of relevance scores (one per doc) for the given query.
-        Handles batching.
-        Higher score = more relevant.
-        """
-        if not docs:
-            return []
-
-        scores = []
-        # process in batches to avoid OOM
-        for i in range(0, len(docs), batch_size):
-            batch_docs = docs[i : i + batch_size]
-            queries = [query] * len(batch_docs)
-
-            inputs = self.tokenizer(
-                queries,
-                batch_docs,
-                padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors="pt",
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-            with torch.no_grad():
-                out = self.model(**inputs).logits  # shape: (batch, n_labels) or (batch, 1)
-            # reduce logits -> score per example
-            # If multiple labels, you may want to take e.g. logits[:, 1] or logits.max(dim=1)
-            if out.ndim == 2 and out.size(1) == 1:
-                batch_scores = out.squeeze(-1).cpu().tolist()
-            elif out.ndim == 2 and out.size(1) > 1:
-                # assume higher logit corresponds to relevance: take max or positive class
-                # adjust this line depending on reranker head (binary/class)
-                batch_scores = out.max(dim=1).values.cpu().tolist()
-            else:
-                batch_scores = out.cpu().tolist()
-                # ensure list of floats
-                batch_scores = [float(x) for x in batch_scores]
-
-            # if single float returned, normalize to list
-            if isinstance(batch_scores, float):
-                batch_scores = [batch_scores]
-
-            scores.extend(batch_scores)
-
-        return scores
-
-_reranker_instance: Optional[CrossEncoderReranker] = None
-
-def get_bge_reranker() -> CrossEncoderReranker:
-    """
-    Return a singleton instance of the BGE cross-encoder reranker.
-    Avoids re-loading model weights for each request.
-    """
-    global _reranker_instance
-    if _reranker_instance is None:
-        _reranker_instance = CrossEncoderReranker(RERANKER_MODEL_NAME)
-    return _reranker_instance
+# One reranker implementation for all pipelines (length-sorted micro-batches,
+# FP16 / int8 / ONNX per device): vector_pipeline.config.CrossEncoderReranker.
+# get_bge_reranker() returns its process-wide singleton.
 
 
 # ---------------------------------------------------------------------------
@@ -118,14 +53,16 @@ def get_bge_embeddings() -> HuggingFaceEmbeddings:
     """
     Create a HuggingFace embeddings object for the configured embedding model.
     - model_name: EMBEDDING_MODEL_NAME (e.g. "BAAI/bge-base-en-v1.5")
-    - device: "cuda" if available, else "cpu"
+    - device: "cuda" / "mps" if available, else "cpu"
+    - FP16 weights on CUDA (half the memory traffic), FP32 otherwise
     - normalize_embeddings=True (recommended for cosine similarity)
     """
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    device = get_device()
+    dtype = torch.float16 if device == "cuda" else torch.float32
 
     embeddings = HuggingFaceEmbeddings(
         model_name=EMBEDDING_MODEL_NAME,
-        model_kwargs={"device": device},
+        model_kwargs={"device": device, "model_kwargs": {"torch_dtype": dtype}},
         encode_kwargs={"normalize_embeddings": True},
     )
     return embeddings
@@ -167,15 +104,11 @@ def retrieve_documents(
         return []
 
     reranker = get_bge_reranker()
-    texts = [d.page_content for d in candidate_docs]
-    scores = reranker.score(query, texts)  # list[float]
+    scores = reranker.score_pairs([(query, d.page_content) for d in candidate_docs])
 
-    # Pair and sort by score descending
-    pairs = list(zip(candidate_docs, scores))
-    pairs.sort(key=lambda t: t[1], reverse=True)
-
-    reranked_docs = [doc for doc, _ in pairs[:k]]
-    return reranked_docs
+    # Indices of the k best scores, best first (no full sort of all candidates)
+    top = topk(scores, k)
+    return [candidate_docs[i] for i in top]
 
 
 # ---------------------------------------------------------------------------
@@ -215,34 +148,35 @@ def build_or_load_vectorstore() -> Chroma:
         vectorstore = Chroma(
             persist_directory=str(CHROMA_DIR),
             embedding_function=embeddings,
-            collection_metadata={"hnsw:space": "cosine"}
+            # HNSW settings (incl. cosine space) are stored with the collection when it
+            # is built; passing a different collection_metadata here would fail.
         )
         print("Vectorstore loaded successfully.")
-        print("Document count:", vectorstore._collection.count())
+        print("Document count:", document_count(vectorstore))
         
         _VECTORSTORE = vectorstore
         return _VECTORSTORE
 
-    # 2) No directory (or empty), but archive exists → unzip & load
+    # 2) No directory (or empty), but archive exists → unpack & load
     else:
-        print(f"No Chroma directory found, but archive exists at {CHROMA_ARCHIVE}.")
-        print("Unpacking Chroma DB archive into CHROMA_DIR ...")
+        print("No Chroma directory found, but an archive exists.")
 
         # Remove any existing directory (empty / wrong)
         if CHROMA_DIR.exists():
             shutil.rmtree(CHROMA_DIR)
 
-        shutil.unpack_archive(str(CHROMA_ARCHIVE), extract_dir=str(CHROMA_DIR), format="zip")
+        unpack_chroma_archive()
 
         print("Archive unpacked. Loading vectorstore ...")
         embeddings = get_bge_embeddings()
         vectorstore = Chroma(
             persist_directory=str(CHROMA_DIR),
             embedding_function=embeddings,
-            collection_metadata={"hnsw:space": "cosine"}
+            # HNSW settings (incl. cosine space) are stored with the collection when it
+            # is built; passing a different collection_metadata here would fail.
         )
         print("Vectorstore loaded successfully.")
-        print("Document count:", vectorstore._collection.count())
+        print("Document count:", document_count(vectorstore))
         
         _VECTORSTORE = vectorstore
         return _VECTORSTORE
@@ -251,9 +185,10 @@ def build_or_load_vectorstore() -> Chroma:
 # Prompt template
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
 def get_prompt_template() -> PromptTemplate:
     """
-    Return the prompt template for RAG QA.
+    Return the prompt template for RAG QA (built once, then cached).
     """
 
     prompt_template = """You are a product knowledge assistant specialized in musical instruments and music-related equipment.
@@ -355,15 +290,21 @@ def get_llm() -> ChatOpenAI:
 # ---------------------------------------------------------------------------
 # Format retrieved documents 
 # ---------------------------------------------------------------------------
+# Chunk bookkeeping keys that mean nothing to the LLM (only cost prompt tokens)
+_PROMPT_SKIP_METADATA = frozenset({"start_index", "row_index"})
+
+
+def _prompt_metadata(doc: Document) -> Dict[str, Any]:
+    return {k: v for k, v in doc.metadata.items() if k not in _PROMPT_SKIP_METADATA}
+
+
 def format_docs(docs):
-    formatted = []
-    for i, doc in enumerate(docs):
-        formatted.append(
-            f"### Document {i+1}\n"
-            f"Content:\n{doc.page_content}\n\n"
-            f"Metadata:\n{doc.metadata}\n"
-        )
-    return "\n\n".join(formatted)
+    return "\n\n".join(
+        f"### Document {i+1}\n"
+        f"Content:\n{doc.page_content}\n\n"
+        f"Metadata:\n{_prompt_metadata(doc)}\n"
+        for i, doc in enumerate(docs)
+    )
 
 
 # ---------------------------------------------------------------------------
@@ -405,6 +346,63 @@ def rewrite_question_with_history(llm, question: str, history: Optional[List[Dic
 
 
 
+# ---------------------------------------------------------------------------
+# RAG pipeline steps (shared by the single and batched entrypoints)
+# ---------------------------------------------------------------------------
+
+def _normalize_session_id(session_id: Optional[str]) -> str:
+    """Avoid accidental None/empty values causing DB NOT NULL errors."""
+    if not session_id:
+        return "default_session"
+    return str(session_id).strip() or "default_session"
+
+
+def prepare_question(llm, question: str, session_id: str):
+    """
+    Load the chat history for `session_id` and rewrite `question` into a
+    standalone question if there is previous history.
+
+    Returns
+    -------
+    (question, history) : tuple
+        The (possibly rewritten) question and the loaded history list.
+    """
+    history = get_user_session(session_id=session_id) or []
+
+    if len(history) > 0:
+        question = rewrite_question_with_history(llm, question, history)
+
+    return question, history
+
+
+def build_prompt(question: str, docs: List[Document]) -> str:
+    """
+    Format the retrieved documents and fill in the RAG prompt template.
+    """
+    context = format_docs(docs)
+    prompt = get_prompt_template()
+    return prompt.format(context=context, question=question)
+
+
+def finalize_answer(
+    session_id: str,
+    original_question: str,
+    answer: str,
+    history: List[Dict[str, Any]],
+) -> str:
+    """
+    Convert the raw LLM answer to HTML and save the updated chat history.
+    """
+    html_answer = convert_answer_to_html(answer)
+
+    new_message_entry = [{"role": "user", "content": original_question}, {"role": "assistant", "content": answer}]
+    history.extend(new_message_entry)
+    print(f"Saving chat history for session_id={session_id!r}")
+    save_chat_history(session_id=session_id, messages=history, html_answer=html_answer)
+
+    return html_answer
+
+
 # ---------------------------------------------------------------------------
 # RAG pipeline function
 # ---------------------------------------------------------------------------
@@ -440,55 +438,236 @@ def ask_question(
     # 1) Get LLM instance
     llm = get_llm()
 
-    # 2) Load chat history for user/session
-    # Normalize session_id to avoid accidental None/empty values causing DB NOT NULL errors
-    if not session_id:
-        session_id = "default_session"
+    # 2) Load chat history for user/session and rephrase if needed
+    session_id = _normalize_session_id(session_id)
+    question, history = prepare_question(llm, question, session_id)
+
+    # 3) Load or build vectorstore (cached singleton)
+    vs: Chroma = build_or_load_vectorstore()
+    embed_fn = lru_cache(maxsize=1)(vs.embeddings.embed_query)  # embed once per turn
+
+    # 4) Answer cache: a hit skips retrieval and the LLM entirely
+    answer = get_cached_answer(question, k, use_reranker, embed_fn=embed_fn)
+
+    if answer is None:
+        # 5) Retrieve documents (retrieval cache first)
+        docs: List[Document] = _retrieve_with_cache(question, vs, k, use_reranker)
+
+        # 6) Format retrieved documents and create prompt
+        prompt = build_prompt(question, docs)
+
+        # 7) Generate answer
+        response = llm.invoke(prompt)
+        answer = getattr(response, "content", "")
+        if answer:
+            set_cached_answer(question, k, use_reranker, answer, embed_fn=embed_fn)
+
+    # 8) Convert answer to HTML and save updated chat history
+    return finalize_answer(session_id, original_question, answer, history)
+
+
+def ask_question_stream(
+    question: str,
+    k: int = 10,
+    use_reranker: bool = False,
+    session_id: str = "default_session",
+) -> Iterator[str]:
+    """
+    Streaming variant of `ask_question`.
+
+    Yields the raw answer text chunk by chunk as the LLM produces it.
+    After the last chunk the chat history is saved, and the generator
+    returns the HTML answer (available as `StopIteration.value`).
+    """
+
+    original_question = question
+
+    llm = get_llm()
+    session_id = _normalize_session_id(session_id)
+    question, history = prepare_question(llm, question, session_id)
+
+    vs: Chroma = build_or_load_vectorstore()
+    embed_fn = lru_cache(maxsize=1)(vs.embeddings.embed_query)
+
+    answer = get_cached_answer(question, k, use_reranker, embed_fn=embed_fn)
+
+    if answer is not None:
+        yield answer
     else:
-        session_id = str(session_id).strip() or "default_session"
+        docs: List[Document] = _retrieve_with_cache(question, vs, k, use_reranker)
+        prompt = build_prompt(question, docs)
 
-    history = get_user_session(session_id=session_id) or []
+        parts: List[str] = []
+        for chunk in llm.stream(prompt):
+            token = getattr(chunk, "content", chunk)
+            if token:
+                parts.append(token)
+                yield token
+
+        answer = "".join(parts)
+        if answer:
+            set_cached_answer(question, k, use_reranker, answer, embed_fn=embed_fn)
+
+    return finalize_answer(session_id, original_question, answer, history)
+
+
+def _retrieve_with_cache(question: str, vs: Chroma, k: int, use_reranker: bool) -> List[Document]:
+    docs = get_cached_docs(question, k, use_reranker)
+    if docs is None:
+        docs = retrieve_documents(query=question, vs=vs, k=k, use_reranker=use_reranker)
+        set_cached_docs(question, k, use_reranker, docs)
+    return docs
 
-    if len(history) > 0:
-        # 1) rephrase if needed
-        question = rewrite_question_with_history(llm, question, history)
 
-    # 2) Load or build vectorstore (cached singleton)
+async def ask_questions_batch(requests: List[Dict[str, Any]]) -> List[Any]:
+    """
+    Batched variant of `ask_question` for several concurrent user turns.
+
+    Each request is a dict with the same keys as the `ask_question`
+    arguments (question, k, use_reranker, session_id).
+
+    - History loading / question rewriting runs concurrently per request.
+    - Answer / retrieval cache hits skip the corresponding steps.
+    - All questions are embedded with one encoder call; the vectors are
+      reused for the semantic cache and the retrieval.
+    - Retrieval is grouped by (k, use_reranker) and done with one Chroma
+      query per group.
+    - The LLM calls are fanned out concurrently.
+
+    Returns one entry per request, in order: the HTML answer, or the
+    exception raised while answering that request.
+    """
+    if not requests:
+        return []
+
+    llm = get_llm()
     vs: Chroma = build_or_load_vectorstore()
 
-    # 3) Retrieve documents
-    docs: List[Document] = retrieve_documents(
-        query=question,
-        vs=vs,
-        k=k,
-        use_reranker=use_reranker,
+    originals = [r["question"] for r in requests]
+    session_ids = [_normalize_session_id(r.get("session_id")) for r in requests]
+    results: List[Any] = [None] * len(requests)
+
+    # 1) Load history + rewrite follow-up questions (one LLM call each)
+    prepared = await asyncio.gather(
+        *(
+            asyncio.to_thread(prepare_question, llm, q, sid)
+            for q, sid in zip(originals, session_ids)
+        ),
+        return_exceptions=True,
     )
 
-    # 4) Format retrieved documents
-    context = format_docs(docs)
-
-    # 5) Create prompt
-    prompt = get_prompt_template()
+    ok = [i for i, prep in enumerate(prepared) if not isinstance(prep, BaseException)]
+    for i, prep in enumerate(prepared):
+        if isinstance(prep, BaseException):
+            results[i] = prep
+
+    # 2) Embed all standalone questions once (one encoder call); the vectors
+    #    serve the semantic cache lookup, the retrieval and the cache store
+    embedding_of: Dict[int, List[float]] = {}
+    if ok:
+        vectors = await asyncio.to_thread(
+            vs.embeddings.embed_documents, [prepared[i][0] for i in ok]
+        )
+        embedding_of = dict(zip(ok, vectors))
+
+    def _embed_fn(i: int):
+        return lambda _question: embedding_of[i]
+
+    # 3) Cache lookups: answer cache first, then retrieval cache
+    def _lookup(i: int):
+        question = prepared[i][0]
+        k, use_reranker = requests[i].get("k", 10), requests[i].get("use_reranker", False)
+        answer = get_cached_answer(question, k, use_reranker, embed_fn=_embed_fn(i))
+        docs = get_cached_docs(question, k, use_reranker) if answer is None else None
+        return answer, docs
+
+    lookups = dict(zip(ok, await asyncio.gather(*(asyncio.to_thread(_lookup, i) for i in ok))))
+
+    answers: Dict[int, str] = {i: a for i, (a, _) in lookups.items() if a is not None}
+    docs_per_request: Dict[int, List[Document]] = {
+        i: d for i, (a, d) in lookups.items() if a is None and d is not None
+    }
+
+    # 4) Batched retrieval for the rest, one group per (k, use_reranker)
+    groups: Dict[tuple, List[int]] = {}
+    for i in ok:
+        if i in answers or i in docs_per_request:
+            continue
+        key = (requests[i].get("k", 10), requests[i].get("use_reranker", False))
+        groups.setdefault(key, []).append(i)
+
+    for (k, use_reranker), idxs in groups.items():
+        queries = [prepared[i][0] for i in idxs]
+        try:
+            batch_docs = await asyncio.to_thread(
+                retrieve_documents_batch, queries, vs, k, use_reranker,
+                query_embeddings=[embedding_of[i] for i in idxs],
+            )
+        except Exception as e:
+            for i in idxs:
+                results[i] = e
+            continue
+        for i, query, docs in zip(idxs, queries, batch_docs):
+            set_cached_docs(query, k, use_reranker, docs)
+            docs_per_request[i] = docs
+
+    # 5) Fan out the LLM calls
+    pending = sorted(docs_per_request)
+    responses = await asyncio.gather(
+        *(
+            asyncio.to_thread(llm.invoke, build_prompt(prepared[i][0], docs_per_request[i]))
+            for i in pending
+        ),
+        return_exceptions=True,
+    )
 
-    # 6) Generate answer
-    response = llm.invoke(prompt.format(context=context, question=question))
-    answer = getattr(response, "content", "")
+    for i, response in zip(pending, responses):
+        if isinstance(response, BaseException):
+            results[i] = response
+            continue
+        answers[i] = getattr(response, "content", "")
+
+    def _store(i: int):
+        req = requests[i]
+        set_cached_answer(
+            prepared[i][0], req.get("k", 10), req.get("use_reranker", False),
+            answers[i], embed_fn=_embed_fn(i),
+        )
 
-    # 7) Convert answer to HTML
-    html_answer = convert_answer_to_html(answer)
+    await asyncio.gather(
+        *(asyncio.to_thread(_store, i) for i in pending if answers.get(i))
+    )
 
-    # 8) Save updated chat history
-    new_message_entry = [{"role": "user", "content": original_question}, {"role": "assistant", "content": answer}]
-    history.extend(new_message_entry)
-    print(f"Saving chat history for session_id={session_id!r}")
-    save_chat_history(session_id=session_id, messages=history, html_answer=html_answer)
+    # 6) HTML conversion + history save (in request order)
+    for i in sorted(answers):
+        _, history = prepared[i]
+        try:
+            results[i] = finalize_answer(session_ids[i], originals[i], answers[i], history)
+        except Exception as e:
+            results[i] = e
 
-    return html_answer
+    return results
 
 # ---------------------------------------------------------------------------
 # Convert answer to HTML
 # ---------------------------------------------------------------------------
 
+# Blank line between a bold heading and the bullet list below it, so
+# Markdown renders the list (compiled once at import).
+_MD_BULLET_RE = re.compile(r"(\*\*.+?\*\*)\n\*")
+
+# One Markdown converter per thread: building one per call re-loads its
+# extensions, and an instance is not safe to share between threads.
+_md_local = threading.local()
+
+
+def _get_markdown() -> markdown.Markdown:
+    md = getattr(_md_local, "md", None)
+    if md is None:
+        md = _md_local.md = markdown.Markdown()
+    return md
+
+
 def convert_answer_to_html(answer: str) -> str:
     """
     Convert the LLM answer to HTML format for better display.
@@ -504,6 +683,6 @@ def convert_answer_to_html(answer: str) -> str:
         The answer converted to HTML format.
     """
 
-    modified_answer = re.sub(r"(\*\*.+?\*\*)\n\*", r"\1\n\n*", answer)
-    html_answer = markdown.markdown(modified_answer)
+    modified_answer = _MD_BULLET_RE.sub(r"\1\n\n*", answer)
+    html_answer = _get_markdown().reset().convert(modified_answer)
     return html_answer
\ No newline at end of file
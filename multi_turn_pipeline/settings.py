@@ -4,6 +4,7 @@ settings.py
 Central configuration for paths and chunking parameters used by
 the vector pipeline (ingestion + retrieval).
 """
+import os
 from pathlib import Path
 
 # Directory: .../PROJECT-25-2-SCRUM-TEAM-DATA/vector_pipeline
@@ -30,4 +31,16 @@ RERANKER_MODEL_NAME: str = "BAAI/bge-reranker-base"
 CLOUD_LLM_MODEL_NAME: str = "google/gemma-3-12b-it:free",
 
 # Path to OpenRouter API key
-OPENROUTER_API_KEY_PATH: str = PROJECT_ROOT / ".env"
\ No newline at end of file
+OPENROUTER_API_KEY_PATH: str = PROJECT_ROOT / ".env"
+
+# Response cache: Redis connection (leave unset to use only the in-process cache)
+REDIS_URL: str | None = os.environ.get("REDIS_URL")
+
+# Time-to-live (seconds) for cached answers / retrievals in Redis
+REDIS_CACHE_TTL: int = int(os.environ.get("REDIS_CACHE_TTL", "3600"))
+
+# Max entries of the in-process (exact match) cache
+LOCAL_CACHE_SIZE: int = 1024
+
+# Min cosine similarity for a semantic cache hit
+SEMANTIC_CACHE_THRESHOLD: float = 0.95
@@ -1,13 +1,14 @@
 import os
 import re
+import asyncio
 import markdown
 import torch
 import shutil
-from typing import Any, Dict, List, Optional
+import threading
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from transformers import (
-    AutoTokenizer,
-    AutoModelForSequenceClassification,
     AutoModelForCausalLM,
     pipeline,
 )
@@ -21,90 +22,22 @@ from langchain_core.runnables import RunnableParallel, RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document
 
+from vector_pipeline.config import CrossEncoderReranker, get_bge_reranker, get_device
+from vector_pipeline._topk_numba import topk
+from vector_pipeline.ingestion import document_count, unpack_chroma_archive
+
 from .settings import (CHROMA_DIR, 
-                       CHROMA_ARCHIVE,
                        OPENROUTER_API_KEY_PATH, 
                        CLOUD_LLM_MODEL_NAME, 
-                       EMBEDDING_MODEL_NAME,
-                       RERANKER_MODEL_NAME)
+                       EMBEDDING_MODEL_NAME)
 
 # ---------------------------------------------------------------------------
 # Cross-encoder reranker
 # ---------------------------------------------------------------------------
 
-class CrossEncoderReranker:
-    """
-    Simple cross-encoder reranker wrapper using HF Transformers.
-    """
-
-    def __init__(self, model_name: str = RERANKER_MODEL_NAME, device: Optional[str] = None):
-        self.model_name = model_name
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
-
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        self.model.to(self.device)
-        self.model.eval()
-
-    def score(self, query: str, docs: List[str], batch_size: int = 16) -> List[float]:
-        """
-        Return a list of relevance scores (one per doc) for the given query.
-        Handles batching.
-        Higher score = more relevant.
-        """
-        if not docs:
-            return []
-
-        scores = []
-        # process in batches to avoid OOM
-        for i in range(0, len(docs), batch_size):
-            batch_docs = docs[i : i + batch_size]
-            queries = [query] * len(batch_docs)
-
-            inputs = self.tokenizer(
-                queries,
-                batch_docs,
-                padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors="pt",
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-            with torch.no_grad():
-                out = self.model(**inputs).logits  # shape: (batch, n_labels) or (batch, 1)
-            # reduce logits -> score per example
-            # If multiple labels, you may want to take e.g. logits[:, 1] or logits.max(dim=1)
-            if out.ndim == 2 and out.size(1) == 1:
-                batch_scores = out.squeeze(-1).cpu().tolist()
-            elif out.ndim == 2 and out.size(1) > 1:
-                # assume higher logit corresponds to relevance: take max or positive class
-                # adjust this line depending on reranker head (binary/class)
-                batch_scores = out.max(dim=1).values.cpu().tolist()
-            else:
-                batch_scores = out.cpu().tolist()
-                # ensure list of floats
-                batch_scores = [float(x) for x in batch_scores]
-
-            # if single float returned, normalize to list
-            if isinstance(batch_scores, float):
-                batch_scores = [batch_scores]
-
-            scores.extend(batch_scores)
-
-        return scores
-
-_reranker_instance: Optional[CrossEncoderReranker] = None
-
-def get_bge_reranker() -> CrossEncoderReranker:
-    """
-    Return a singleton instance of the BGE cross-encoder reranker.
-    Avoids re-loading model weights for each request.
-    """
-    global _reranker_instance
-    if _reranker_instance is None:
-        _reranker_instance = CrossEncoderReranker(RERANKER_MODEL_NAME)
-    return _reranker_instance
+# One reranker implementation for all pipelines (length-sorted micro-batches,
+# FP16 / int8 / ONNX per device): vector_pipeline.config.CrossEncoderReranker.
+# get_bge_reranker() returns its process-wide singleton.
 
 
 # ---------------------------------------------------------------------------
@@ -117,14 +50,16 @@ def get_bge_embeddings() -> HuggingFaceEmbeddings:
 
     We match Muhammet's configuration:
     - model_name: EMBEDDING_MODEL_NAME (e.g. "BAAI/bge-base-en-v1.5")
-    - device: "cuda" if available, else "cpu"
+    - device: "cuda" / "mps" if available, else "cpu"
+    - FP16 weights on CUDA (half the memory traffic), FP32 otherwise
     - normalize_embeddings=True (recommended for cosine similarity)
     """
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    device = get_device()
+    dtype = torch.float16 if device == "cuda" else torch.float32
 
     embeddings = HuggingFaceEmbeddings(
         model_name=EMBEDDING_MODEL_NAME,
-        model_kwargs={"device": device},
+        model_kwargs={"device": device, "model_kwargs": {"torch_dtype": dtype}},
         encode_kwargs={"normalize_embeddings": True},
     )
     return embeddings
@@ -166,15 +101,11 @@ def retrieve_documents(
         return []
 
     reranker = get_bge_reranker()
-    texts = [d.page_content for d in candidate_docs]
-    scores = reranker.score(query, texts)  # list[float]
+    scores = reranker.score_pairs([(query, d.page_content) for d in candidate_docs])
 
-    # Pair and sort by score descending
-    pairs = list(zip(candidate_docs, scores))
-    pairs.sort(key=lambda t: t[1], reverse=True)
-
-    reranked_docs = [doc for doc, _ in pairs[:k]]
-    return reranked_docs
+    # Indices of the k best scores, best first (no full sort of all candidates)
+    top = topk(scores, k)
+    return [candidate_docs[i] for i in top]
 
 
 # ---------------------------------------------------------------------------
@@ -214,34 +145,35 @@ def build_or_load_vectorstore() -> Chroma:
         vectorstore = Chroma(
             persist_directory=str(CHROMA_DIR),
             embedding_function=embeddings,
-            collection_metadata={"hnsw:space": "cosine"}
+            # HNSW settings (incl. cosine space) are stored with the collection when it
+            # is built; passing a different collection_metadata here would fail.
         )
         print("Vectorstore loaded successfully.")
-        print("Document count:", vectorstore._collection.count())
+        print("Document count:", document_count(vectorstore))
         
         _VECTORSTORE = vectorstore
         return _VECTORSTORE
 
-    # 2) No directory (or empty), but archive exists → unzip & load
+    # 2) No directory (or empty), but archive exists → unpack & load
     else:
-        print(f"No Chroma directory found, but archive exists at {CHROMA_ARCHIVE}.")
-        print("Unpacking Chroma DB archive into CHROMA_DIR ...")
+        print("No Chroma directory found, but an archive exists.")
 
         # Remove any existing directory (empty / wrong)
         if CHROMA_DIR.exists():
             shutil.rmtree(CHROMA_DIR)
 
-        shutil.unpack_archive(str(CHROMA_ARCHIVE), extract_dir=str(CHROMA_DIR), format="zip")
+        unpack_chroma_archive()
 
         print("Archive unpacked. Loading vectorstore ...")
         embeddings = get_bge_embeddings()
         vectorstore = Chroma(
             persist_directory=str(CHROMA_DIR),
             embedding_function=embeddings,
-            collection_metadata={"hnsw:space": "cosine"}
+            # HNSW settings (incl. cosine space) are stored with the collection when it
+            # is built; passing a different collection_metadata here would fail.
         )
         print("Vectorstore loaded successfully.")
-        print("Document count:", vectorstore._collection.count())
+        print("Document count:", document_count(vectorstore))
         
         _VECTORSTORE = vectorstore
         return _VECTORSTORE
@@ -250,9 +182,10 @@ def build_or_load_vectorstore() -> Chroma:
 # Prompt template
 # ---------------------------------------------------------------------------
 
+@lru_cache(maxsize=1)
 def get_prompt_template() -> PromptTemplate:
     """
-    Return the prompt template for RAG QA.
+    Return the prompt template for RAG QA (built once, then cached).
     """
 
     prompt_template = """You are a product knowledge assistant specialized in musical instruments and music-related equipment.
@@ -305,12 +238,14 @@ The dataset you are working with contains:
 # ---------------------------------------------------------------------------
 # LLM instance
 # ---------------------------------------------------------------------------
+@lru_cache(maxsize=1)
 def get_llm() -> ChatOpenAI:
     """
     Return a ChatOpenAI LLM instance using OpenRouter.
 
     The OPENROUTER_API_KEY is read from the .env file at
-    OPENROUTER_API_KEY_PATH.
+    OPENROUTER_API_KEY_PATH. The instance is created once and reused
+    (the .env file is read only on the first call).
     """
 
     # Load API key from .env file
@@ -341,15 +276,21 @@ def get_llm() -> ChatOpenAI:
 # ---------------------------------------------------------------------------
 # Format retrieved documents 
 # ---------------------------------------------------------------------------
+# Chunk bookkeeping keys that mean nothing to the LLM (only cost prompt tokens)
+_PROMPT_SKIP_METADATA = frozenset({"start_index", "row_index"})
+
+
+def _prompt_metadata(doc: Document) -> Dict[str, Any]:
+    return {k: v for k, v in doc.metadata.items() if k not in _PROMPT_SKIP_METADATA}
+
+
 def format_docs(docs):
-    formatted = []
-    for i, doc in enumerate(docs):
-        formatted.append(
-            f"### Document {i+1}\n"
-            f"Content:\n{doc.page_content}\n\n"
-            f"Metadata:\n{doc.metadata}\n"
-        )
-    return "\n\n".join(formatted)
+    return "\n\n".join(
+        f"### Document {i+1}\n"
+        f"Content:\n{doc.page_content}\n\n"
+        f"Metadata:\n{_prompt_metadata(doc)}\n"
+        for i, doc in enumerate(docs)
+    )
 
 # ---------------------------------------------------------------------------
 # RAG pipeline function
@@ -389,10 +330,10 @@ def ask_question(
     # 3) Format retrieved documents
     context = format_docs(docs)
 
-    # 4) Create prompt
+    # 4) Get prompt (cached)
     prompt = get_prompt_template()
 
-    # 5) Get LLM instance
+    # 5) Get LLM instance (cached singleton)
     llm = get_llm()
 
     # 6) Generate answer
@@ -403,10 +344,75 @@ def ask_question(
     html_answer = convert_answer_to_html(answer)
     return html_answer
 
+async def _aprepare_prompt(question: str, k: int, use_reranker: bool) -> Tuple[str, ChatOpenAI]:
+    """
+    Async steps 1-5 of `ask_question`: the vectorstore, prompt template and
+    LLM are loaded concurrently, then retrieval runs in a worker thread.
+    """
+    vs, prompt, llm = await asyncio.gather(
+        asyncio.to_thread(build_or_load_vectorstore),
+        asyncio.to_thread(get_prompt_template),
+        asyncio.to_thread(get_llm),
+    )
+    docs: List[Document] = await asyncio.to_thread(
+        retrieve_documents, question, vs, k, use_reranker
+    )
+    return prompt.format(context=format_docs(docs), question=question), llm
+
+
+async def aask_question(
+    question: str,
+    k: int = 10,
+    use_reranker: bool = True,
+) -> str:
+    """
+    Async version of `ask_question` (same arguments, returns the HTML answer).
+    """
+    prompt_text, llm = await _aprepare_prompt(question, k, use_reranker)
+    response = await llm.ainvoke(prompt_text)
+    answer = getattr(response, "content", "")
+    return convert_answer_to_html(answer)
+
+
+async def aask_question_stream(
+    question: str,
+    k: int = 10,
+    use_reranker: bool = True,
+) -> AsyncIterator[str]:
+    """
+    Streaming async version of `ask_question`.
+
+    Yields the raw answer text chunk by chunk as the LLM produces it, so the
+    first tokens can be shown before the answer is complete; pass the joined
+    text to `convert_answer_to_html` for the final HTML.
+    """
+    prompt_text, llm = await _aprepare_prompt(question, k, use_reranker)
+    async for chunk in llm.astream(prompt_text):
+        token = getattr(chunk, "content", chunk)
+        if token:
+            yield token
+
+
 # ---------------------------------------------------------------------------
 # Convert answer to HTML
 # ---------------------------------------------------------------------------
 
+# Blank line between a bold heading and the bullet list below it, so
+# Markdown renders the list (compiled once at import).
+_MD_BULLET_RE = re.compile(r"(\*\*.+?\*\*)\n\*")
+
+# One Markdown converter per thread: building one per call re-loads its
+# extensions, and an instance is not safe to share between threads.
+_md_local = threading.local()
+
+
+def _get_markdown() -> markdown.Markdown:
+    md = getattr(_md_local, "md", None)
+    if md is None:
+        md = _md_local.md = markdown.Markdown()
+    return md
+
+
 def convert_answer_to_html(answer: str) -> str:
     """
     Convert the LLM answer to HTML format for better display.
@@ -422,6 +428,6 @@ def convert_answer_to_html(answer: str) -> str:
         The answer converted to HTML format.
     """
 
-    modified_answer = re.sub(r"(\*\*.+?\*\*)\n\*", r"\1\n\n*", answer)
-    html_answer = markdown.markdown(modified_answer)
+    modified_answer = _MD_BULLET_RE.sub(r"\1\n\n*", answer)
+    html_answer = _get_markdown().reset().convert(modified_answer)
     return html_answer
\ No newline at end of file
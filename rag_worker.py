@@ -0,0 +1,180 @@
+# rag_worker.py
+
+"""
+Standalone RAG inference worker.
+
+Runs the embedder + reranker + LLM pipeline in its own process, so the
+API workers (uvicorn) only do async I/O and the CPU-heavy inference gets
+its own cores. The API talks to it over a local Unix domain socket using
+length-prefixed msgpack frames.
+
+Typical deployment (API on cores 0-3, inference on cores 4-11):
+
+    taskset -c 4-11 python -m rag_worker
+    RAG_WORKER_SOCKET=/tmp/rag_worker.sock taskset -c 0-3 \\
+        uvicorn backend.main:app --workers 4
+
+Instead of taskset, RAG_WORKER_CPUS="4-11" pins the worker from inside.
+
+Each request is handled by one of RAG_WORKER_THREADS inference threads.
+"""
+
+import os
+import sys
+import struct
+import asyncio
+import traceback
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+import msgpack
+
+# Unix socket the worker listens on / the API connects to
+RAG_WORKER_SOCKET = os.environ.get("RAG_WORKER_SOCKET", "/tmp/rag_worker.sock")
+
+# Number of inference threads in the worker
+RAG_WORKER_THREADS = int(os.environ.get("RAG_WORKER_THREADS", "4"))
+
+# Pipeline module served by the worker (same setting as the API)
+RAG_BACKEND = os.environ.get("RAG_BACKEND", "multi_turn_pipeline.rag_pipeline")
+
+# Optional CPU pinning, e.g. "4-11" or "4,5,6,7"
+RAG_WORKER_CPUS = os.environ.get("RAG_WORKER_CPUS")
+
+_HEADER = struct.Struct(">I")  # 4-byte big-endian frame length
+
+
+# ----------------------------------------------------------------------
+# Framing
+# ----------------------------------------------------------------------
+
+async def read_frame(reader: asyncio.StreamReader) -> Any:
+    header = await reader.readexactly(_HEADER.size)
+    (length,) = _HEADER.unpack(header)
+    return msgpack.unpackb(await reader.readexactly(length), raw=False)
+
+
+def write_frame(writer: asyncio.StreamWriter, obj: Any) -> None:
+    payload = msgpack.packb(obj, use_bin_type=True)
+    writer.write(_HEADER.pack(len(payload)) + payload)
+
+
+# ----------------------------------------------------------------------
+# Client (used by the API process)
+# ----------------------------------------------------------------------
+
+class RagWorkerError(RuntimeError):
+    """Raised on the client side when the worker reports an error."""
+
+
+class RagWorkerClient:
+    """
+    Async client for the RAG worker.
+
+    One short-lived Unix socket connection per call: connecting to a local
+    socket is cheap and keeps concurrent calls independent.
+    """
+
+    def __init__(self, socket_path: str = RAG_WORKER_SOCKET):
+        self.socket_path = socket_path
+
+    async def call(self, method: str, **kwargs: Any) -> Any:
+        reader, writer = await asyncio.open_unix_connection(self.socket_path)
+        try:
+            write_frame(writer, {"method": method, "kwargs": kwargs})
+            await writer.drain()
+            reply = await read_frame(reader)
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+        if not reply.get("ok"):
+            error = reply.get("error", "unknown error")
+            if reply.get("type") == "ValueError":
+                raise ValueError(error)
+            raise RagWorkerError(error)
+        return reply["result"]
+
+    async def ask_question(self, **kwargs: Any) -> str:
+        return await self.call("ask_question", **kwargs)
+
+
+# ----------------------------------------------------------------------
+# Server (the worker process)
+# ----------------------------------------------------------------------
+
+def _parse_cpus(spec: str) -> set:
+    cpus = set()
+    for part in spec.split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.update(range(int(lo), int(hi) + 1))
+        elif part.strip():
+            cpus.add(int(part))
+    return cpus
+
+
+class RagWorker:
+    """Serves RAG pipeline calls received over the Unix socket."""
+
+    def __init__(self, threads: int = RAG_WORKER_THREADS, backend: str = RAG_BACKEND):
+        # Imported here so the API process can import the client without
+        # pulling in torch / transformers.
+        rag_pipeline = importlib.import_module(backend)
+
+        self.methods = {"ask_question": rag_pipeline.ask_question}
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="rag")
+        self._warmup = (rag_pipeline.build_or_load_vectorstore, rag_pipeline.get_llm)
+
+    def warm(self) -> None:
+        for fn in self._warmup:
+            fn()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await read_frame(reader)
+            fn = self.methods.get(request.get("method"))
+            if fn is None:
+                reply: Dict[str, Any] = {"ok": False, "error": f"unknown method {request.get('method')!r}"}
+            else:
+                loop = asyncio.get_running_loop()
+                try:
+                    result = await loop.run_in_executor(
+                        self.executor, lambda: fn(**request.get("kwargs", {}))
+                    )
+                    reply = {"ok": True, "result": result}
+                except Exception as e:
+                    traceback.print_exc()
+                    reply = {"ok": False, "type": type(e).__name__, "error": str(e)}
+            write_frame(writer, reply)
+            await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path: str = RAG_WORKER_SOCKET) -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = await asyncio.start_unix_server(self.handle, path=socket_path)
+        print(f"RAG worker listening on {socket_path} ({self.executor._max_workers} threads)")
+        async with server:
+            await server.serve_forever()
+
+
+def main(socket_path: Optional[str] = None) -> None:
+    if RAG_WORKER_CPUS and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, _parse_cpus(RAG_WORKER_CPUS))
+        print(f"RAG worker pinned to CPUs {RAG_WORKER_CPUS}")
+
+    worker = RagWorker()
+    worker.warm()
+    try:
+        asyncio.run(worker.serve(socket_path or RAG_WORKER_SOCKET))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
+import os
+import asyncio
 import httpx
 import sys
 from typing import Dict, Any, List
 
 # --- Configuration ---
-API_URL = "http://127.0.0.1:8000/api/chat"
+BASE_URL = "http://127.0.0.1:8000"
+API_URL = BASE_URL + "/api/chat"
 TIMEOUT_SECONDS = 30.0 # RAG calls can take a while
 
+# Number of concurrent requests sent over the shared client (>1 for a quick load test)
+CONCURRENCY = int(os.environ.get("TEST_CONCURRENCY", "1"))
+
 # --- Teammate's Test Payload (Must be encapsulated in the full ChatRequest structure) ---
 USER_QUERY = "I want to have a YAMAHA electric guitar which is the most rated product in the site."
 
@@ -17,10 +23,64 @@ TEST_PAYLOAD = {
         {"role": "user", "content": USER_QUERY}
     ],
     "top_k": 10,
-    "use_reranker": False
+    "use_reranker": False,
+    # Ask for the full history echo too, so both response shapes are checked
+    "include_history": True
 }
 
 
+def make_client() -> httpx.AsyncClient:
+    """One pooled client for all requests: connections are kept alive and reused."""
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        timeout=TIMEOUT_SECONDS,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    )
+
+
+async def post_chat(n: int = CONCURRENCY) -> List[httpx.Response]:
+    """Send the test payload `n` times concurrently over the shared client."""
+    async with make_client() as client:
+        return await asyncio.gather(*[client.post("/api/chat", json=TEST_PAYLOAD) for _ in range(n)])
+
+
+def check_response(response: httpx.Response) -> None:
+    # 1. Check HTTP Status (Raises exception for 4xx/5xx errors)
+    response.raise_for_status()
+
+    # 2. Parse JSON response
+    data = response.json() # REMOVING TYPE HINT TO BYPASS PERSISTENT SYNTAX ERROR
+
+    # 3. Critical Data Assertions
+
+    # A. Status Check
+    assert data.get("status") == "success", f"API status was not 'success': {data.get('status')}"
+    
+    # B. Answer Check
+    answer = data.get("answer", "")
+    print(f"\n✅ Answer received (first 100 chars): {answer[:100]}...")
+    # Since this query targets specific product data, we expect a robust answer.
+    assert len(answer) > 50, "Answer is suspiciously short (expected detailed product info)."
+    
+    # C. History Check (delta response: only this turn's assistant message)
+    new_messages: List[Dict[str, str]] = data.get("new_messages", [])
+    assert len(new_messages) == 1, f"Delta length mismatch. Expected 1 new message (assistant), got {len(new_messages)}"
+    assert new_messages[-1]['role'] == 'assistant', "The new message is not from the assistant"
+    assert data.get("history_id") == TEST_PAYLOAD["session_id"], f"Unexpected history_id: {data.get('history_id')}"
+
+    # Full history echo (include_history=True): the user message + the reply
+    messages: List[Dict[str, str]] = data.get("messages", [])
+    expected_len = len(TEST_PAYLOAD["messages"]) + 1
+    assert len(messages) == expected_len, f"History length mismatch. Expected {expected_len}, got {len(messages)}"
+    assert messages[-1] == new_messages[-1], "Last history message is not the new assistant message"
+    
+    # D. Retrieved Documents Check 
+    retrieved: List[Any] = data.get("retrieved", [])
+    # Since the 'rag_pipeline.ask_question()' V1 signature doesn't return retrieved documents, 
+    # main.py correctly sets this to an empty list.
+    assert retrieved == [], f"Retrieved documents should be empty for V1, got {retrieved}"
+
+
 def test_chat_endpoint_with_notebook_payload():
     """
     Sends the specific payload from the rag_pipeline_test.ipynb notebook 
@@ -30,39 +90,13 @@ def test_chat_endpoint_with_notebook_payload():
     print("Query: \"%s\"" % USER_QUERY)
     
     try:
-        # Use httpx to make the POST request to the running server
-        response = httpx.post(API_URL, json=TEST_PAYLOAD, timeout=TIMEOUT_SECONDS)
-        
-        # 1. Check HTTP Status (Raises exception for 4xx/5xx errors)
-        response.raise_for_status()
-        
-        # 2. Parse JSON response
-        data = response.json() # REMOVING TYPE HINT TO BYPASS PERSISTENT SYNTAX ERROR
-        
-        # 3. Critical Data Assertions
-        
-        # A. Status Check
-        assert data.get("status") == "success", f"API status was not 'success': {data.get('status')}"
-        
-        # B. Answer Check
-        answer = data.get("answer", "")
-        print(f"\n✅ Answer received (first 100 chars): {answer[:100]}...")
-        # Since this query targets specific product data, we expect a robust answer.
-        assert len(answer) > 50, "Answer is suspiciously short (expected detailed product info)."
-        
-        # C. History Check
-        messages: List[Dict[str, str]] = data.get("messages", [])
-        assert len(messages) == 2, f"History length mismatch. Expected 2 messages (user + assistant), got {len(messages)}"
-        assert messages[-1]['role'] == 'assistant', "The last message is not from the assistant"
-        
-        # D. Retrieved Documents Check 
-        retrieved: List[Any] = data.get("retrieved", [])
-        # Since the 'rag_pipeline.ask_question()' V1 signature doesn't return retrieved documents, 
-        # main.py correctly sets this to an empty list.
-        assert retrieved == [], f"Retrieved documents should be empty for V1, got {retrieved}"
+        # Use the pooled async client to POST to the running server
+        responses = asyncio.run(post_chat())
+        for response in responses:
+            check_response(response)
 
         print("\n✅ *** INTEGRATION TEST SUCCESSFUL ***")
-        print("FastAPI successfully processed the notebook payload and returned a valid ChatResponse.")
+        print("FastAPI successfully processed the notebook payload and returned a valid ChatResponseDelta.")
         
     except httpx.HTTPStatusError as e:
         print(f"\n❌ *** TEST FAILED (HTTP Error) ***")
@@ -0,0 +1,60 @@
+"""
+Smoke test for the one-time Chroma DB build (vector_pipeline.ingestion).
+
+Builds a DB from a handful of rows into a temporary directory with the
+real embedding model, then checks the stored vectors match query-time
+embeddings. Skipped when the heavy dependencies are not installed.
+"""
+
+import pytest
+
+pytest.importorskip("chromadb")
+pytest.importorskip("pyarrow")
+pytest.importorskip("sentence_transformers")
+
+import pandas as pd
+
+from vector_pipeline import config, ingestion
+
+
+@pytest.fixture
+def tmp_build(tmp_path, monkeypatch):
+    df = pd.DataFrame(
+        {
+            "combined_text": [
+                "Red running shoes\nlightweight mesh upper",
+                "Stainless steel water bottle, 1 litre",
+                "Wireless noise-cancelling headphones",
+            ],
+            "product_id": ["p1", "p2", "p3"],
+            "title": ["Runner", "Bottle", "Headphones"],
+            "price": [59.9, None, 199.0],
+        }
+    )
+    data_path = tmp_path / "products.parquet"
+    df.to_parquet(data_path, index=False)
+
+    chroma_dir = tmp_path / "chroma_db"
+    monkeypatch.setattr(ingestion, "DATA_PATH", data_path)
+    monkeypatch.setattr(ingestion, "DATA_PICKLE_PATH", tmp_path / "missing.pkl")
+    monkeypatch.setattr(ingestion, "CHROMA_DIR", chroma_dir)
+    monkeypatch.setattr(ingestion, "CHROMA_META_PATH", chroma_dir / "_meta.json")
+    monkeypatch.setattr(ingestion, "EMBEDDING_CACHE_DIR", tmp_path / "embedding_cache")
+    monkeypatch.setattr(config, "INFINITY_URL", None)
+    return df
+
+
+def test_build_chroma_vectorstore(tmp_build):
+    vs = ingestion.build_chroma_vectorstore()
+
+    assert vs._collection.count() == len(tmp_build)
+    assert ingestion.document_count(vs) == len(tmp_build)
+
+    # the missing price is left out of the metadata, not stored as 0
+    stored = vs._collection.get(include=["metadatas"])["metadatas"]
+    assert {m["product_id"]: m.get("price") for m in stored}["p2"] is None
+
+    # stored vectors match what the query path embeds for the same text
+    doc, distance = vs.similarity_search_with_score(tmp_build["combined_text"][0], k=1)[0]
+    assert doc.metadata["product_id"] == "p1"
+    assert distance < 1e-3
@@ -0,0 +1,86 @@
+"""
+_topk_numba.py
+
+Top-k selection for reranker scores.
+
+Uses a Numba-compiled min-heap selection (O(n log k), no Python objects)
+when numba is installed, otherwise falls back to NumPy argpartition.
+Both return the indices of the k highest scores, best first.
+"""
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # numba is optional
+    numba = None
+
+
+def _topk_numpy(scores: np.ndarray, k: int) -> np.ndarray:
+    if k >= scores.shape[0]:
+        return np.argsort(-scores, kind="stable")
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+if numba is not None:
+
+    @numba.njit(cache=True)
+    def _sift_down(heap_vals, heap_idx, pos, size):
+        # restore the min-heap property below `pos`
+        while True:
+            left = 2 * pos + 1
+            if left >= size:
+                break
+            child = left
+            right = left + 1
+            if right < size and heap_vals[right] < heap_vals[left]:
+                child = right
+            if heap_vals[child] >= heap_vals[pos]:
+                break
+            heap_vals[pos], heap_vals[child] = heap_vals[child], heap_vals[pos]
+            heap_idx[pos], heap_idx[child] = heap_idx[child], heap_idx[pos]
+            pos = child
+
+    @numba.njit(cache=True)
+    def _topk_numba(scores, k):
+        n = scores.shape[0]
+        if k > n:
+            k = n
+        heap_vals = np.empty(k, dtype=scores.dtype)
+        heap_idx = np.empty(k, dtype=np.int64)
+
+        # heapify the first k scores
+        for i in range(k):
+            heap_vals[i] = scores[i]
+            heap_idx[i] = i
+        for pos in range(k // 2 - 1, -1, -1):
+            _sift_down(heap_vals, heap_idx, pos, k)
+
+        # keep the k largest: replace the heap minimum when beaten
+        for i in range(k, n):
+            if scores[i] > heap_vals[0]:
+                heap_vals[0] = scores[i]
+                heap_idx[0] = i
+                _sift_down(heap_vals, heap_idx, 0, k)
+
+        # pop in ascending order, fill the result from the back
+        out = np.empty(k, dtype=np.int64)
+        size = k
+        while size > 0:
+            out[size - 1] = heap_idx[0]
+            size -= 1
+            heap_vals[0] = heap_vals[size]
+            heap_idx[0] = heap_idx[size]
+            _sift_down(heap_vals, heap_idx, 0, size)
+        return out
+
+
+def topk(scores, k: int) -> np.ndarray:
+    """Indices of the `k` highest `scores`, sorted by score descending."""
+    scores = np.ascontiguousarray(scores, dtype=np.float32)
+    if k <= 0 or scores.shape[0] == 0:
+        return np.empty(0, dtype=np.int64)
+    if numba is not None:
+        return _topk_numba(scores, k)
+    return _topk_numpy(scores, k)
@@ -9,6 +9,7 @@ It hides the internal details (Chroma, embeddings, reranker, LLM) and
 exposes a small, stable Python API they can call from a web service:
 
     - run_chat(messages, k=4, use_reranker=True)
+    - arun_chat(...)  (same, for async backends: `await arun_chat(messages)`)
 
 Typical usage on backend side:
 
@@ -29,13 +30,22 @@ session id, database, etc.) and sending the full history in `messages`
 when calling run_chat().
 """
 
+import os
+import asyncio
+import threading
 from typing import Any, Dict, List, Optional
 from langchain_community.vectorstores import Chroma
 
 #from langchain_chroma import Chroma
 
 from .ingestion import build_or_load_vectorstore
-from .retrieval import retrieve_documents, rag_answer
+from .config import get_hf_llm
+from .retrieval import (
+    retrieve_documents,
+    aretrieve_documents,
+    rag_answer_from_docs,
+    arag_answer_from_docs,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -43,6 +53,7 @@ from .retrieval import retrieve_documents, rag_answer
 # ---------------------------------------------------------------------------
 
 _vectorstore: Optional[Chroma] = None
+_vectorstore_lock = threading.Lock()
 
 
 def get_vectorstore() -> Chroma:
@@ -50,16 +61,29 @@ def get_vectorstore() -> Chroma:
     Return a singleton Chroma vectorstore instance.
 
     - First call: build or load the persisted DB from disk using
-      `build_or_load_vectorstore()`.
+      `build_or_load_vectorstore()` (under a lock, so concurrent first
+      calls load it only once).
     - Later calls: reuse the already loaded in-memory instance.
     """
     global _vectorstore
-
     if _vectorstore is None:
-        _vectorstore = build_or_load_vectorstore()
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                _vectorstore = build_or_load_vectorstore()
     return _vectorstore
 
 
+def _reset_vectorstore() -> None:
+    # forked children open their own Chroma client
+    global _vectorstore, _vectorstore_lock
+    _vectorstore = None
+    _vectorstore_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_vectorstore)
+
+
 # ---------------------------------------------------------------------------
 # Helper: extract the latest user query
 # ---------------------------------------------------------------------------
@@ -88,6 +112,8 @@ def run_chat(
     messages: List[Dict[str, Any]],
     k: int = 4,
     use_reranker: bool = True,
+    *,
+    inplace: bool = False,
 ) -> Dict[str, Any]:
     """
     Main entrypoint for the chatbot (WITHOUT LangGraph).
@@ -108,6 +134,11 @@ def run_chat(
         Whether to use the BGE cross-encoder reranker in addition to
         vector similarity search. Default: True.
 
+    inplace:
+        If True, the assistant message is appended to `messages` itself and
+        the same list is returned as "messages" (no copy of the history;
+        the caller's list is mutated). Default: False (a new list).
+
     Returns
     -------
     result: dict with keys
@@ -124,7 +155,8 @@ def run_chat(
     last_msg = _get_last_user_message(messages)
     query = str(last_msg.get("content", ""))
 
-    # 1) Retrieve docs (with optional reranker)
+    # 1) Retrieve docs (with optional reranker) -- the only embedding,
+    #    vector search and rerank of this turn
     docs = retrieve_documents(
         query=query,
         vs=vs,
@@ -141,20 +173,67 @@ def run_chat(
             }
         )
 
-    # 2) Produce RAG answer using the same vectorstore and settings
-    answer_text = rag_answer(
-        query=query,
-        vs=vs,
-        k=k,
-        use_reranker=use_reranker,
-    )
+    # 2) Produce RAG answer from the docs retrieved above
+    answer_text = rag_answer_from_docs(query, docs)
 
     # 3) Append assistant message to history
     assistant_message: Dict[str, Any] = {
         "role": "assistant",
         "content": answer_text,
     }
-    updated_messages = [*messages, assistant_message]
+    if inplace:
+        messages.append(assistant_message)
+        updated_messages = messages
+    else:
+        updated_messages = [*messages, assistant_message]
+
+    return {
+        "answer": answer_text,
+        "messages": updated_messages,
+        "retrieved": retrieved,
+    }
+
+
+async def arun_chat(
+    messages: List[Dict[str, Any]],
+    k: int = 4,
+    use_reranker: bool = True,
+    *,
+    inplace: bool = False,
+) -> Dict[str, Any]:
+    """
+    Async version of `run_chat` for async backends (same arguments and result).
+
+    Embedding, vector search and reranking run in worker threads and the
+    LLM call is awaited, so the event loop is never blocked. The LLM is
+    resolved (loaded on first use) concurrently with the retrieval.
+    """
+    vs = await asyncio.to_thread(get_vectorstore)
+
+    last_msg = _get_last_user_message(messages)
+    query = str(last_msg.get("content", ""))
+
+    docs, _ = await asyncio.gather(
+        aretrieve_documents(query=query, vs=vs, k=k, use_reranker=use_reranker),
+        asyncio.to_thread(get_hf_llm),
+    )
+
+    retrieved: List[Dict[str, Any]] = [
+        {"metadata": doc.metadata, "snippet": doc.page_content[:400]}
+        for doc in docs
+    ]
+
+    answer_text = await arag_answer_from_docs(query, docs)
+
+    assistant_message: Dict[str, Any] = {
+        "role": "assistant",
+        "content": answer_text,
+    }
+    if inplace:
+        messages.append(assistant_message)
+        updated_messages = messages
+    else:
+        updated_messages = [*messages, assistant_message]
 
     return {
         "answer": answer_text,
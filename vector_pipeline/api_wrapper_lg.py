@@ -55,12 +55,23 @@ All variants return a dict with keys:
           }
 """
 
-from typing import Any, Dict, List, Optional
+import os
+import json
+import time
+import uuid
+import threading
+from typing import Any, Dict, List, Optional, Tuple
 
 from langchain_chroma import Chroma
 
 from .ingestion import build_or_load_vectorstore
-from .retrieval import retrieve_documents, rag_answer
+from .retrieval import QueryContext, retrieve_documents, rag_answer_from_docs
+from .settings import (
+    QUERY_CACHE_DIR,
+    QUERY_CACHE_THRESHOLD,
+    QUERY_CACHE_TTL_S,
+    QUERY_CACHE_MAX_ENTRIES,
+)
 
 # LangGraph-based helpers live in the separate `langgraph_app` package.
 # They are optional: if you don't create langgraph_app, only the classic
@@ -81,6 +92,7 @@ except ImportError:
 # ---------------------------------------------------------------------------
 
 _vectorstore: Optional[Chroma] = None
+_vectorstore_lock = threading.Lock()
 
 
 def get_vectorstore() -> Chroma:
@@ -88,16 +100,152 @@ def get_vectorstore() -> Chroma:
     Return a singleton Chroma vectorstore instance.
 
     - First call: build or load the persisted DB from disk using
-      `build_or_load_vectorstore()`.
+      `build_or_load_vectorstore()` (under a lock, so concurrent first
+      calls load it only once).
     - Later calls: reuse the already loaded in-memory instance.
     """
     global _vectorstore
-
     if _vectorstore is None:
-        _vectorstore = build_or_load_vectorstore()
+        with _vectorstore_lock:
+            if _vectorstore is None:
+                _vectorstore = build_or_load_vectorstore()
     return _vectorstore
 
 
+# ---------------------------------------------------------------------------
+# Semantic answer cache (query embedding -> answer + retrieved chunks)
+# ---------------------------------------------------------------------------
+
+_query_cache: Optional[Chroma] = None
+_query_cache_lock = threading.Lock()
+_query_cache_size = 0  # entries in the collection (tracked, not counted per add)
+_EVICT_SLICES = 24  # age slices the TTL window is walked in when evicting
+
+
+def _get_query_cache() -> Chroma:
+    """Singleton Chroma collection of answered queries (cosine space)."""
+    global _query_cache, _query_cache_size
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                cache = Chroma(
+                    collection_name="query_cache",
+                    embedding_function=get_vectorstore().embeddings,
+                    persist_directory=str(QUERY_CACHE_DIR),
+                    collection_metadata={"hnsw:space": "cosine"},
+                )
+                _query_cache_size = cache._collection.count()
+                _query_cache = cache
+    return _query_cache
+
+
+def _cache_filter(k: int, use_reranker: bool) -> Dict[str, Any]:
+    return {"$and": [
+        {"k": k},
+        {"use_reranker": use_reranker},
+        {"created_at": {"$gte": time.time() - QUERY_CACHE_TTL_S}},
+    ]}
+
+
+def _evict_cached_answers(cache: Chroma) -> None:
+    """
+    Drop expired entries, then the oldest ones down to 90% of the cap.
+
+    Only ids are fetched: the TTL window is walked in age slices, oldest
+    first, asking each slice for at most the entries still to delete.
+    Called under `_query_cache_lock`.
+    """
+    global _query_cache_size
+    collection = cache._collection
+    now = time.time()
+    oldest = now - QUERY_CACHE_TTL_S
+
+    expired = collection.get(where={"created_at": {"$lt": oldest}}, include=[])["ids"]
+    if expired:
+        collection.delete(ids=expired)
+    size = _query_cache_size - len(expired)
+
+    excess = size - int(QUERY_CACHE_MAX_ENTRIES * 0.9)
+    step = QUERY_CACHE_TTL_S / _EVICT_SLICES
+    while excess > 0 and oldest < now:
+        ids = collection.get(
+            where={"$and": [
+                {"created_at": {"$gte": oldest}},
+                {"created_at": {"$lt": oldest + step}},
+            ]},
+            limit=excess,
+            include=[],
+        )["ids"]
+        if ids:
+            collection.delete(ids=ids)
+            excess -= len(ids)
+            size -= len(ids)
+        oldest += step
+    _query_cache_size = max(size, 0)
+
+
+def _lookup_cached_answer(
+    embedding: List[float], k: int, use_reranker: bool
+) -> Optional[Tuple[str, List[Dict[str, Any]]]]:
+    """Return (answer, retrieved) of the most similar cached query, if similar enough."""
+    cache = _get_query_cache()
+    hits = cache.similarity_search_by_vector_with_relevance_scores(
+        embedding, k=1, filter=_cache_filter(k, use_reranker)
+    )
+    # Chroma returns the cosine *distance* here
+    if not hits or 1.0 - hits[0][1] < QUERY_CACHE_THRESHOLD:
+        return None
+    metadata = hits[0][0].metadata
+    return metadata["answer"], json.loads(metadata["retrieved_json"])
+
+
+def _store_cached_answer(
+    query: str,
+    embedding: List[float],
+    k: int,
+    use_reranker: bool,
+    answer: str,
+    retrieved: List[Dict[str, Any]],
+) -> None:
+    global _query_cache_size
+    # Nothing retrieved means the fixed "nothing found" reply: not worth
+    # caching (the product DB may cover the query after a rebuild)
+    if not retrieved or not answer.strip():
+        return
+    cache = _get_query_cache()
+    # Added with the embedding already computed for retrieval (no re-embedding)
+    cache._collection.add(
+        ids=[str(uuid.uuid4())],
+        embeddings=[embedding],
+        documents=[query],
+        metadatas=[{
+            "k": k,
+            "use_reranker": use_reranker,
+            "answer": answer,
+            "retrieved_json": json.dumps(retrieved, default=str),
+            "created_at": time.time(),
+        }],
+    )
+    with _query_cache_lock:
+        _query_cache_size += 1
+        if _query_cache_size > QUERY_CACHE_MAX_ENTRIES:
+            _evict_cached_answers(cache)
+
+
+def _reset_vectorstore() -> None:
+    # forked children open their own Chroma clients
+    global _vectorstore, _vectorstore_lock, _query_cache, _query_cache_lock, _query_cache_size
+    _vectorstore = None
+    _vectorstore_lock = threading.Lock()
+    _query_cache = None
+    _query_cache_size = 0
+    _query_cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_vectorstore)
+
+
 # ---------------------------------------------------------------------------
 # Helper: extract the latest user query
 # ---------------------------------------------------------------------------
@@ -117,6 +265,11 @@ def _get_last_user_message(messages: List[Dict[str, Any]]) -> Dict[str, Any]:
     return messages[-1]
 
 
+def _has_prior_turns(messages: List[Dict[str, Any]]) -> bool:
+    """True if there are user/assistant messages before the latest one."""
+    return any(m.get("role") in ("user", "assistant") for m in messages[:-1])
+
+
 # ---------------------------------------------------------------------------
 # Classic API for backend (WITHOUT LangGraph)
 # ---------------------------------------------------------------------------
@@ -126,6 +279,8 @@ def run_chat(
     messages: List[Dict[str, Any]],
     k: int = 4,
     use_reranker: bool = True,
+    *,
+    inplace: bool = False,
 ) -> Dict[str, Any]:
     """
     Main entrypoint for the chatbot (WITHOUT LangGraph).
@@ -146,6 +301,11 @@ def run_chat(
         Whether to use the BGE cross-encoder reranker in addition to
         vector similarity search. Default: True.
 
+    inplace:
+        If True, the assistant message is appended to `messages` itself and
+        the same list is returned as "messages" (no copy of the history;
+        the caller's list is mutated). Default: False (a new list).
+
     Returns
     -------
     result: dict with keys
@@ -162,37 +322,53 @@ def run_chat(
     last_msg = _get_last_user_message(messages)
     query = str(last_msg.get("content", ""))
 
-    # 1) Retrieve docs (with optional reranker)
-    docs = retrieve_documents(
-        query=query,
-        vs=vs,
-        k=k,
-        use_reranker=use_reranker,
-    )
-
-    retrieved: List[Dict[str, Any]] = []
-    for doc in docs:
-        retrieved.append(
-            {
-                "metadata": doc.metadata,
-                "snippet": doc.page_content[:400],
-            }
+    # The query is embedded once: for the cache lookup and the retrieval
+    ctx = QueryContext(query)
+    embedding = ctx.get_embedding(vs)
+
+    # The cache is keyed on the query alone, so it is only used for the
+    # first turn: a follow-up ("and cheaper ones?") depends on the history
+    use_cache = not _has_prior_turns(messages)
+
+    cached = _lookup_cached_answer(embedding, k, use_reranker) if use_cache else None
+    if cached is not None:
+        # A (near-)identical question was answered before: skip retrieval + LLM
+        answer_text, retrieved = cached
+    else:
+        # 1) Retrieve docs (with optional reranker) -- the only embedding,
+        #    vector search and rerank of this turn
+        docs = retrieve_documents(
+            query=query,
+            vs=vs,
+            k=k,
+            use_reranker=use_reranker,
+            ctx=ctx,
         )
 
-    # 2) Produce RAG answer using the same vectorstore and settings
-    answer_text = rag_answer(
-        query=query,
-        vs=vs,
-        k=k,
-        use_reranker=use_reranker,
-    )
+        retrieved: List[Dict[str, Any]] = []
+        for doc in docs:
+            retrieved.append(
+                {
+                    "metadata": doc.metadata,
+                    "snippet": doc.page_content[:400],
+                }
+            )
+
+        # 2) Produce RAG answer from the docs retrieved above
+        answer_text = rag_answer_from_docs(query, docs)
+        if use_cache:
+            _store_cached_answer(query, embedding, k, use_reranker, answer_text, retrieved)
 
     # 3) Append assistant message to history
     assistant_message: Dict[str, Any] = {
         "role": "assistant",
         "content": answer_text,
     }
-    updated_messages = [*messages, assistant_message]
+    if inplace:
+        messages.append(assistant_message)
+        updated_messages = messages
+    else:
+        updated_messages = [*messages, assistant_message]
 
     return {
         "answer": answer_text,
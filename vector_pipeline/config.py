@@ -4,28 +4,49 @@ config.py
 Model configuration utilities for the vector pipeline:
 
 - get_bge_embeddings():
-    Sentence encoder for building & querying Chroma.
+    Sentence encoder for building & querying Chroma (an Infinity server
+    when INFINITY_URL is set, else in-process).
 
 - CrossEncoderReranker + get_bge_reranker():
     Optional second-stage reranker using a cross-encoder model.
 
 - get_hf_llm():
-    Hugging Face based LLM (via transformers + LangChain HuggingFacePipeline)
-    for RAG answers. No OpenAI dependency.
+    Hugging Face based LLM for RAG answers: served by a vLLM / TGI server
+    when VLLM_URL is set, else in-process (transformers + LangChain
+    HuggingFacePipeline). No OpenAI account needed.
 """
 
-from typing import List, Optional
+import os
+import json
+import shutil
+import tempfile
+import threading
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
 
+import httpx
+import numpy as np
 import torch
 from transformers import (
     AutoTokenizer,
     AutoModelForSequenceClassification,
     AutoModelForCausalLM,
+    PreTrainedTokenizerFast,
     pipeline,
 )
 from langchain_huggingface import HuggingFaceEmbeddings, HuggingFacePipeline
 
-from .settings import EMBEDDING_MODEL_NAME, RERANKER_MODEL_NAME, LLM_MODEL_NAME
+from .settings import (
+    EMBEDDING_MODEL_NAME,
+    EMBED_BATCH_SIZE,
+    INFINITY_URL,
+    RERANKER_MODEL_NAME,
+    RERANKER_BACKEND,
+    RERANKER_ONNX_DIR,
+    LLM_MODEL_NAME,
+    VLLM_URL,
+    VLLM_MODEL,
+    TORCH_COMPILE,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -33,103 +54,345 @@ from .settings import EMBEDDING_MODEL_NAME, RERANKER_MODEL_NAME, LLM_MODEL_NAME
 # ---------------------------------------------------------------------------
 
 
-def get_bge_embeddings() -> HuggingFaceEmbeddings:
+def get_device() -> str:
+    """Best available torch device: "cuda", then Apple "mps", else "cpu"."""
+    if torch.cuda.is_available():
+        return "cuda"
+    mps = getattr(torch.backends, "mps", None)
+    if mps is not None and mps.is_available():
+        return "mps"
+    return "cpu"
+
+
+def get_infinity_embeddings():
+    """
+    Embeddings client for an Infinity server at INFINITY_URL serving
+    EMBEDDING_MODEL_NAME (same interface as HuggingFaceEmbeddings).
+    """
+    from langchain_community.embeddings import InfinityEmbeddings
+
+    return InfinityEmbeddings(model=EMBEDDING_MODEL_NAME, infinity_api_url=INFINITY_URL)
+
+
+_embeddings_instances: dict = {}  # local flag -> embeddings object
+_embeddings_lock = threading.Lock()
+
+
+def get_bge_embeddings(local: bool = False):
+    """
+    Return a singleton embeddings object for the configured embedding model.
+
+    All callers (retrieval, ingestion, api wrappers) share it, so only one
+    copy of the model is loaded. Double-checked lock: concurrent first
+    calls load the model only once.
     """
-    Create a HuggingFace embeddings object for the configured embedding model.
+    key = bool(local or not INFINITY_URL)
+    embeddings = _embeddings_instances.get(key)
+    if embeddings is None:
+        with _embeddings_lock:
+            embeddings = _embeddings_instances.get(key)
+            if embeddings is None:
+                embeddings = _embeddings_instances[key] = _load_bge_embeddings(local)
+    return embeddings
+
 
-    We match Muhammet's configuration:
+def _load_bge_embeddings(local: bool = False):
+    """
+    Create an embeddings object for the configured embedding model.
+
+    If INFINITY_URL is set (and `local` is False), the Infinity server
+    client from get_infinity_embeddings() is returned.
+
+    Otherwise a HuggingFaceEmbeddings object, matching Muhammet's configuration:
     - model_name: EMBEDDING_MODEL_NAME (e.g. "BAAI/bge-base-en-v1.5")
-    - device: "cuda" if available, else "cpu"
+    - device: get_device() ("cuda" / "mps" if available, else "cpu")
+    - FP16 weights on CUDA (half the memory traffic), FP32 otherwise
     - normalize_embeddings=True (recommended for cosine similarity)
+    - batch_size=EMBED_BATCH_SIZE for embed_documents (the default of 32
+      under-uses a GPU)
     """
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if INFINITY_URL and not local:
+        return get_infinity_embeddings()
+
+    device = get_device()
+    dtype = torch.float16 if device == "cuda" else torch.float32
 
     embeddings = HuggingFaceEmbeddings(
         model_name=EMBEDDING_MODEL_NAME,
-        model_kwargs={"device": device},
-        encode_kwargs={"normalize_embeddings": True},
+        model_kwargs={"device": device, "model_kwargs": {"torch_dtype": dtype}},
+        encode_kwargs={"normalize_embeddings": True, "batch_size": EMBED_BATCH_SIZE},
     )
     return embeddings
 
 
+def load_sentence_transformer():
+    """
+    A SentenceTransformer for EMBEDDING_MODEL_NAME, for the DB build.
+
+    Same device and dtype as get_bge_embeddings() (FP16 on CUDA). Built
+    explicitly: HuggingFaceEmbeddings keeps its model private.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    device = get_device()
+    dtype = torch.float16 if device == "cuda" else torch.float32
+    return SentenceTransformer(
+        EMBEDDING_MODEL_NAME, device=device, model_kwargs={"torch_dtype": dtype}
+    )
+
+
 # ---------------------------------------------------------------------------
 # Cross-encoder reranker
 # ---------------------------------------------------------------------------
 
 
+def _load_onnx_reranker(model_name: str, device: str = "cpu"):
+    """
+    Load the reranker as an ONNX Runtime model.
+
+    - CPU: int8 dynamically-quantized graph on the CPUExecutionProvider
+      (intra-op threads from OMP_NUM_THREADS, if set).
+    - CUDA: the exported (not quantized) graph on the CUDAExecutionProvider.
+
+    The first call exports (+ quantizes) the model into RERANKER_ONNX_DIR;
+    later calls load the cached files. Both steps write into a temporary
+    directory that is moved into place only when complete, so a failed or
+    interrupted export never leaves half-written files behind.
+    """
+    import onnxruntime as ort
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+    exported_file = RERANKER_ONNX_DIR / "model.onnx"
+    if not exported_file.exists():
+        print(f"Exporting {model_name} to ONNX in {RERANKER_ONNX_DIR} ...")
+        RERANKER_ONNX_DIR.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".reranker_onnx_", dir=RERANKER_ONNX_DIR.parent)
+        try:
+            model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            model.save_pretrained(tmp_dir)
+            # leftovers of an export from before this was atomic
+            shutil.rmtree(RERANKER_ONNX_DIR, ignore_errors=True)
+            os.replace(tmp_dir, RERANKER_ONNX_DIR)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    if device == "cuda":
+        return ORTModelForSequenceClassification.from_pretrained(
+            RERANKER_ONNX_DIR, file_name=exported_file.name, provider="CUDAExecutionProvider"
+        )
+
+    quantized_file = RERANKER_ONNX_DIR / "model_quantized.onnx"
+    if not quantized_file.exists():
+        print(f"Quantizing {exported_file} to int8 ...")
+        tmp_dir = tempfile.mkdtemp(prefix=".reranker_onnx_q_", dir=RERANKER_ONNX_DIR.parent)
+        try:
+            quantizer = ORTQuantizer.from_pretrained(RERANKER_ONNX_DIR, file_name=exported_file.name)
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=tmp_dir, quantization_config=qconfig)
+            # the quantized graph last: its presence marks a complete step
+            for name in sorted(os.listdir(tmp_dir), key=lambda n: n == quantized_file.name):
+                os.replace(os.path.join(tmp_dir, name), RERANKER_ONNX_DIR / name)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    session_options = ort.SessionOptions()
+    if os.environ.get("OMP_NUM_THREADS"):
+        session_options.intra_op_num_threads = int(os.environ["OMP_NUM_THREADS"])
+
+    return ORTModelForSequenceClassification.from_pretrained(
+        RERANKER_ONNX_DIR,
+        file_name=quantized_file.name,
+        provider="CPUExecutionProvider",
+        session_options=session_options,
+    )
+
+
+# Max tokens of a (query, doc) pair, and of the query part
+_MAX_SEQ_LEN = 512
+_MAX_QUERY_TOKENS = 64
+
+
 class CrossEncoderReranker:
     """
     Simple cross-encoder reranker wrapper using HF Transformers.
+
+    - GPU: BF16 / FP16 PyTorch weights, or ONNX Runtime on the CUDA
+      provider when `backend` is "onnx".
+    - Apple GPU (mps): FP32 PyTorch weights.
+    - CPU: int8 ONNX Runtime model when `backend` is "onnx" (or "auto" with
+      optimum installed), otherwise PyTorch with int8 dynamic quantization.
     """
 
-    def __init__(self, model_name: str = RERANKER_MODEL_NAME, device: Optional[str] = None):
+    def __init__(
+        self,
+        model_name: str = RERANKER_MODEL_NAME,
+        device: Optional[str] = None,
+        backend: str = RERANKER_BACKEND,
+        micro_bs: int = 16,
+    ):
         self.model_name = model_name
-        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.micro_bs = micro_bs
+        self.device = device or get_device()
+
+        # Rust (fast) tokenizer: batch encoding of the docs runs in native code.
+        # TOKENIZERS_PARALLELISM is left to the process entry point (the
+        # backend disables it), since its threads deadlock across fork.
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+        if not isinstance(self.tokenizer, PreTrainedTokenizerFast):
+            print(f"No fast tokenizer available for {model_name}, reranking will be slower.")
+        # (query, token ids) of the last scored query
+        self._last_query_ids: Optional[tuple] = None
+
+        self.model = None
+        # "auto" uses ONNX Runtime on CPU only; on GPU the half-precision
+        # PyTorch model is already fast, "onnx" forces the CUDA provider.
+        if backend == "onnx" or (backend == "auto" and self.device == "cpu"):
+            try:
+                self.model = _load_onnx_reranker(model_name, self.device)
+            except ImportError:
+                if backend == "onnx":
+                    print("optimum[onnxruntime] is not installed, falling back to PyTorch reranker.")
+            except Exception as e:
+                # e.g. unsupported opset, or no avx512_vnni for the quantizer:
+                # "auto" must still give a working reranker
+                if backend == "onnx":
+                    raise
+                print(f"ONNX reranker failed ({e}), falling back to PyTorch reranker.")
+
+        if self.model is None:
+            if self.device == "cuda":
+                # BF16 where supported (Ampere+), FP16 otherwise
+                dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+            else:
+                dtype = torch.float32
+            self.model = AutoModelForSequenceClassification.from_pretrained(model_name, torch_dtype=dtype)
+            self.model.to(self.device)
+            self.model.eval()
+            if self.device == "cpu":
+                # int8 weights for the Linear layers (dynamic activation quantization)
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            if TORCH_COMPILE and hasattr(torch, "compile"):
+                # dynamic=True: micro-batches vary in batch size and length
+                mode = "reduce-overhead" if self.device == "cuda" else "default"
+                self.model = torch.compile(self.model, mode=mode, dynamic=True)
+
+    def _query_ids(self, query: str) -> List[int]:
+        """Token ids of `query` (no special tokens), cached for repeated reranks of one turn."""
+        cached = self._last_query_ids
+        if cached is not None and cached[0] == query:
+            return cached[1]
+        ids = self.tokenizer(
+            query, add_special_tokens=False, truncation=True, max_length=_MAX_QUERY_TOKENS
+        )["input_ids"]
+        self._last_query_ids = (query, ids)
+        return ids
+
+    def _to_device(self, inputs) -> dict:
+        """
+        Move tokenized inputs to the model device.
 
-        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
-        self.model = AutoModelForSequenceClassification.from_pretrained(model_name)
-        self.model.to(self.device)
-        self.model.eval()
+        On CUDA the tensors are pinned (page-locked) first so the copy is
+        asynchronous and overlaps with queuing the forward pass.
+        """
+        if self.device != "cuda":
+            return {k: v.to(self.device) for k, v in inputs.items()}
+        return {k: v.pin_memory().to(self.device, non_blocking=True) for k, v in inputs.items()}
 
-    def score(self, query: str, docs: List[str], batch_size: int = 16) -> List[float]:
+    def score(self, query: str, docs: List[str], batch_size: Optional[int] = None) -> List[float]:
         """
         Return a list of relevance scores (one per doc) for the given query.
-        Handles batching.
         Higher score = more relevant.
+
+        The query is tokenized once (not once per doc) and each (query, doc)
+        pair is assembled from the token ids.
         """
         if not docs:
             return []
 
-        scores = []
-        # process in batches to avoid OOM
-        for i in range(0, len(docs), batch_size):
-            batch_docs = docs[i : i + batch_size]
-            queries = [query] * len(batch_docs)
-
-            inputs = self.tokenizer(
-                queries,
-                batch_docs,
-                padding=True,
-                truncation=True,
-                max_length=512,
-                return_tensors="pt",
-            )
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-
-            with torch.no_grad():
+        q_ids = self._query_ids(query)
+        max_doc_len = _MAX_SEQ_LEN - len(q_ids) - self.tokenizer.num_special_tokens_to_add(pair=True)
+        d_ids = self.tokenizer(
+            docs, add_special_tokens=False, truncation=True, max_length=max_doc_len
+        )["input_ids"]
+
+        features = {"input_ids": [
+            self.tokenizer.build_inputs_with_special_tokens(q_ids, d) for d in d_ids
+        ]}
+        if "token_type_ids" in self.tokenizer.model_input_names:
+            features["token_type_ids"] = [
+                self.tokenizer.create_token_type_ids_from_sequences(q_ids, d) for d in d_ids
+            ]
+        return self._score_features(features, batch_size)
+
+    def score_pairs(self, pairs: List[Tuple[str, str]], batch_size: Optional[int] = None) -> List[float]:
+        """
+        Return a relevance score for each (query, doc) pair.
+
+        Pairs may come from different queries, so the candidates of several
+        queries are reranked with one call.
+        """
+        if not pairs:
+            return []
+
+        features = self.tokenizer(
+            [q for q, _ in pairs],
+            [d for _, d in pairs],
+            truncation="only_second",  # clip the doc, never the query
+            max_length=_MAX_SEQ_LEN,
+        )
+        return self._score_features(dict(features), batch_size)
+
+    def _score_features(self, features: dict, batch_size: Optional[int] = None) -> List[float]:
+        """
+        Score already tokenized (unpadded) pairs.
+
+        Pairs are sorted by token length and scored in micro-batches that
+        are each padded only to their own longest sequence.
+        """
+        n = len(features["input_ids"])
+        micro_bs = batch_size or self.micro_bs
+        order = np.argsort([len(ids) for ids in features["input_ids"]], kind="stable")
+
+        scores = np.empty(n, dtype=np.float32)
+        for i in range(0, n, micro_bs):
+            idx = order[i : i + micro_bs]
+
+            batch = {k: [v[j] for j in idx] for k, v in features.items()}
+            inputs = self.tokenizer.pad(batch, padding="longest", return_tensors="pt")
+            inputs = self._to_device(inputs)
+
+            with torch.inference_mode():
                 out = self.model(**inputs).logits  # shape: (batch, n_labels) or (batch, 1)
             # reduce logits -> score per example
-            # If multiple labels, you may want to take e.g. logits[:, 1] or logits.max(dim=1)
-            if out.ndim == 2 and out.size(1) == 1:
-                batch_scores = out.squeeze(-1).cpu().tolist()
-            elif out.ndim == 2 and out.size(1) > 1:
+            if out.ndim == 2 and out.size(1) > 1:
                 # assume higher logit corresponds to relevance: take max or positive class
                 # adjust this line depending on reranker head (binary/class)
-                batch_scores = out.max(dim=1).values.cpu().tolist()
-            else:
-                batch_scores = out.cpu().tolist()
-                # ensure list of floats
-                batch_scores = [float(x) for x in batch_scores]
+                out = out.max(dim=1).values
+            # scatter back to the original pair order
+            scores[idx] = out.reshape(-1).float().cpu().numpy()
 
-            # if single float returned, normalize to list
-            if isinstance(batch_scores, float):
-                batch_scores = [batch_scores]
+        return scores.tolist()
 
-            scores.extend(batch_scores)
-
-        return scores
 
 _reranker_instance: Optional[CrossEncoderReranker] = None
+_reranker_lock = threading.Lock()
 
 
 def get_bge_reranker() -> CrossEncoderReranker:
     """
     Return a singleton instance of the BGE cross-encoder reranker.
     Avoids re-loading model weights for each request.
+
+    Double-checked lock: concurrent first calls load the model only once.
     """
     global _reranker_instance
     if _reranker_instance is None:
-        _reranker_instance = CrossEncoderReranker(RERANKER_MODEL_NAME)
+        with _reranker_lock:
+            if _reranker_instance is None:
+                _reranker_instance = CrossEncoderReranker(RERANKER_MODEL_NAME)
     return _reranker_instance
 
 
@@ -138,20 +401,124 @@ def get_bge_reranker() -> CrossEncoderReranker:
 # ---------------------------------------------------------------------------
 
 
-_llm_instance: Optional[HuggingFacePipeline] = None
+# Shared connection pool limits for the vLLM clients (keep-alive connections
+# are reused across requests instead of reconnecting per call)
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=50)
 
 
-def get_hf_llm() -> HuggingFacePipeline:
+class VLLMClient:
     """
-    Return a singleton LangChain LLM built on a Hugging Face
-    text-generation pipeline.
+    Thin client for an OpenAI-compatible completions server (vLLM / TGI).
 
-    This replaces any OpenAI Chat model usage for the vector_pipeline part.
+    The server batches concurrent prompts on the GPU (continuous batching),
+    so many chat turns can generate at once instead of queueing on one
+    in-process pipeline. Exposes the same invoke / stream methods as a
+    LangChain LLM, plus async variants.
+    """
+
+    def __init__(self, base_url: str, model: str, max_tokens: int = 512, timeout: float = 120.0):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+        self._client: Optional[httpx.Client] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
+
+    def _payload(self, prompt: str, stream: bool = False) -> dict:
+        return {
+            "model": self.model,
+            "prompt": prompt,
+            "max_tokens": self.max_tokens,
+            "temperature": 0.0,
+            "stream": stream,
+        }
+
+    @property
+    def client(self) -> httpx.Client:
+        if self._client is None:
+            self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, limits=_HTTP_LIMITS)
+        return self._client
+
+    @property
+    def aclient(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=_HTTP_LIMITS)
+        return self._aclient
+
+    async def aclose(self) -> None:
+        """Close the pooled connections (e.g. on app shutdown)."""
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    @staticmethod
+    def _sse_text(line: str) -> Optional[str]:
+        # "data: {...}" frames; "data: [DONE]" ends the stream
+        if not line.startswith("data: ") or line == "data: [DONE]":
+            return None
+        return json.loads(line[len("data: "):])["choices"][0]["text"]
+
+    def invoke(self, prompt: str) -> str:
+        r = self.client.post("/v1/completions", json=self._payload(prompt))
+        r.raise_for_status()
+        return r.json()["choices"][0]["text"]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        with self.client.stream("POST", "/v1/completions", json=self._payload(prompt, stream=True)) as r:
+            r.raise_for_status()
+            for line in r.iter_lines():
+                text = self._sse_text(line)
+                if text:
+                    yield text
+
+    async def ainvoke(self, prompt: str) -> str:
+        r = await self.aclient.post("/v1/completions", json=self._payload(prompt))
+        r.raise_for_status()
+        return r.json()["choices"][0]["text"]
+
+    async def astream(self, prompt: str) -> AsyncIterator[str]:
+        async with self.aclient.stream("POST", "/v1/completions", json=self._payload(prompt, stream=True)) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                text = self._sse_text(line)
+                if text:
+                    yield text
+
+
+_llm_instance = None  # HuggingFacePipeline or VLLMClient
+_llm_lock = threading.Lock()
+
+
+def get_hf_llm():
+    """
+    Return a singleton LangChain LLM for LLM_MODEL_NAME.
+
+    - VLLM_URL set → VLLMClient for the vLLM / TGI server
+      (OpenAI-compatible API, no API key needed)
+    - otherwise    → in-process Hugging Face text-generation pipeline
+
+    Thread-safe: concurrent first calls load the model only once.
     """
     global _llm_instance
     if _llm_instance is not None:
         return _llm_instance
 
+    with _llm_lock:
+        if _llm_instance is None:
+            _llm_instance = VLLMClient(VLLM_URL, VLLM_MODEL) if VLLM_URL else _load_hf_llm()
+    return _llm_instance
+
+
+async def aclose_hf_llm() -> None:
+    """Close the vLLM client's pooled connections, if one was created (e.g. on shutdown)."""
+    if isinstance(_llm_instance, VLLMClient):
+        await _llm_instance.aclose()
+
+
+def _load_hf_llm() -> HuggingFacePipeline:
     device = 0 if torch.cuda.is_available() else -1
 
     tokenizer = AutoTokenizer.from_pretrained(LLM_MODEL_NAME)
@@ -160,6 +527,9 @@ def get_hf_llm() -> HuggingFacePipeline:
         torch_dtype=torch.float16 if torch.cuda.is_available() else torch.float32,
         device_map="auto" if torch.cuda.is_available() else None,
     )
+    if TORCH_COMPILE and hasattr(torch, "compile"):
+        # compile forward only: the pipeline still needs the HF model object
+        model.forward = torch.compile(model.forward, dynamic=True)
 
     gen_pipe = pipeline(
         "text-generation",
@@ -171,5 +541,21 @@ def get_hf_llm() -> HuggingFacePipeline:
         device=device,
     )
 
-    _llm_instance = HuggingFacePipeline(pipeline=gen_pipe)
-    return _llm_instance
+    return HuggingFacePipeline(pipeline=gen_pipe)
+
+
+def _reset_singletons() -> None:
+    # A forked child must not reuse the parent's models (CUDA contexts do not
+    # survive fork); it loads its own copies on first use.
+    global _reranker_instance, _llm_instance, _reranker_lock, _llm_lock
+    global _embeddings_instances, _embeddings_lock
+    _reranker_instance = None
+    _llm_instance = None
+    _embeddings_instances = {}
+    _reranker_lock = threading.Lock()
+    _llm_lock = threading.Lock()
+    _embeddings_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_singletons)
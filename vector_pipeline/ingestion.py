@@ -14,10 +14,20 @@ This file is *offline*:
 it only runs when you (re)build the vector database.
 """
 
+import os
+import json
+import uuid
+import hashlib
 import shutil
-from typing import List, Dict, Any
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional
 
+import chromadb
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
+from joblib import Parallel, delayed
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from langchain_community.vectorstores import Chroma
@@ -26,14 +36,39 @@ from langchain_community.vectorstores import Chroma
 
 from .settings import (
     DATA_PATH,
+    DATA_PICKLE_PATH,
+    WANTED_COLUMNS,
+    METADATA_COLUMNS,
     COMBINED_TEXT_COLUMN,
     CHROMA_DIR,
     CHROMA_ARCHIVE,
+    CHROMA_ARCHIVE_ZST,
+    CHROMA_META_PATH,
     COLLECTION_NAME,  # currently "langchain"
     CHUNK_SIZE,
     CHUNK_OVERLAP,
+    HNSW_METADATA,
+    VECTOR_DTYPE,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_MODEL_NAME,
+    EMBED_BATCH_SIZE,
 )
-from .config import get_bge_embeddings
+from .config import get_bge_embeddings, load_sentence_transformer
+
+try:
+    # Rust text splitter (compiled chunking loop); optional
+    from semantic_text_splitter import TextSplitter as RustTextSplitter
+except ImportError:
+    RustTextSplitter = None
+
+# Below this many documents per worker, process start-up costs more than it saves
+_MIN_DOCS_PER_JOB = 1000
+
+# Rows per collection.add during the one-time build
+ADD_BATCH_SIZE = 10000
+
+# Newly encoded embeddings are flushed to the on-disk cache every this many rows
+CACHE_FLUSH_ROWS = 16384
 
 
 # ---------------------------------------------------------------------------
@@ -43,76 +78,176 @@ from .config import get_bge_embeddings
 
 def load_dataframe() -> pd.DataFrame:
     """
-    Load the preprocessed product dataframe from DATA_PATH.
+    Load the preprocessed product dataframe from DATA_PATH (Parquet).
 
-    This file should already contain a `combined_text` column
-    (or whatever COMBINED_TEXT_COLUMN is set to).
+    Only WANTED_COLUMNS are read. The file should contain a `combined_text`
+    column (or whatever COMBINED_TEXT_COLUMN is set to). If only the legacy
+    pickle exists, it is converted to Parquet once.
     """
-    df = pd.read_pickle(DATA_PATH)
+    if not DATA_PATH.exists() and DATA_PICKLE_PATH.exists():
+        print(f"Converting {DATA_PICKLE_PATH} to {DATA_PATH} ...")
+        pd.read_pickle(DATA_PICKLE_PATH).to_parquet(DATA_PATH, engine="pyarrow", index=False)
 
-    if COMBINED_TEXT_COLUMN not in df.columns:
+    available = pq.read_schema(DATA_PATH).names
+    if COMBINED_TEXT_COLUMN not in available:
         raise ValueError(
             f"Expected column '{COMBINED_TEXT_COLUMN}' in {DATA_PATH}, "
-            f"but found: {list(df.columns)}"
+            f"but found: {available}"
         )
 
+    # Arrow -> pandas without a consolidation copy (split_blocks), freeing
+    # each Arrow column once converted (self_destruct): peak memory stays
+    # close to one copy of the data. numpy-backed dtypes, not
+    # dtype_backend="pyarrow": the NaN fills and tolist() below expect them.
+    columns = [c for c in WANTED_COLUMNS if c in available]
+    table = pq.read_table(DATA_PATH, columns=columns)
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+
     # Drop rows with missing combined_text completely.
     df = df.dropna(subset=[COMBINED_TEXT_COLUMN])
 
-    # Replace remaining NaNs with empty strings for safe metadata.
-    df = df.fillna("")
+    # Replace remaining NaNs in text columns with "" for safe metadata.
+    # Numeric NaNs are kept (no made-up 0 price / rating): those keys are
+    # left out of the chunk metadata instead (see _native_values).
+    str_cols = df.select_dtypes(include="object").columns
+    df[str_cols] = df[str_cols].fillna("")
 
     return df
 
 
-def dataframe_to_documents(df: pd.DataFrame) -> List[Document]:
+def _native_values(col: pd.Series) -> list:
+    """
+    Column values as Chroma-compatible Python objects.
+
+    `tolist()` already converts numeric columns to int/float; only object
+    columns can still hold NumPy scalars (Chroma rejects e.g. np.int64
+    metadata), so only those are checked value by value. Missing values
+    in float columns become None, i.e. "leave this key out".
+    """
+    values = col.tolist()
+    if col.dtype == object:
+        values = [v.item() if isinstance(v, np.generic) else v for v in values]
+    elif col.dtype.kind == "f" and col.hasnans:
+        values = [None if v != v else v for v in values]  # NaN != NaN
+    return values
+
+
+def dataframe_to_documents(df: pd.DataFrame, start_row: int = 0) -> List[Document]:
     """
     Turn each dataframe row into a single LangChain Document.
 
     - page_content: df[COMBINED_TEXT_COLUMN]
-    - metadata    : all other columns in that row + a `row_index` field
+    - metadata    : the METADATA_COLUMNS of that row + a `row_index` field
                     to identify the original row.
 
     Having `row_index` is useful later if you want to group chunks back
-    into full "products" or original rows.
+    into full "products" or original rows. `start_row` is the position of
+    the first row of `df` in the full dataframe (for slices of it).
     """
-    docs: List[Document] = []
+    # Pull every column out once as a list of native Python values, instead
+    # of building a pandas Series per row (iterrows).
+    texts = df[COMBINED_TEXT_COLUMN].astype(str).tolist()
+    meta_names = [c for c in METADATA_COLUMNS if c in df.columns]
+    meta_cols = [_native_values(df[c]) for c in meta_names]
+
+    docs: List[Document] = [None] * len(texts)
 
-    for row_index, (_, row) in enumerate(df.iterrows()):
-        row_dict: Dict[str, Any] = row.to_dict()
-        page_content = str(row_dict.pop(COMBINED_TEXT_COLUMN))
-        metadata = row_dict
+    for row_index, values in enumerate(zip(*meta_cols) if meta_cols else ((),) * len(texts)):
+        metadata: Dict[str, Any] = {
+            name: value for name, value in zip(meta_names, values) if value is not None
+        }
 
         # Add stable row identifier to metadata.
-        metadata["row_index"] = int(row_index)
+        metadata["row_index"] = start_row + row_index
+
+        page_content = texts[row_index]
 
         # Optional: prepend product name to page_content for extra weight.
         # name = metadata.get("product_name") or metadata.get("title")
         # if name:
         #     page_content = f"{name}\n\n{page_content}"
 
-        docs.append(Document(page_content=page_content, metadata=metadata))
+        docs[row_index] = Document(page_content=page_content, metadata=metadata)
 
     return docs
 
 
-def chunk_documents(documents: List[Document]) -> List[Document]:
+def _split_shard(shard: List[Document], chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Split one shard of documents (runs inside a worker process)."""
+    if RustTextSplitter is not None:
+        # Same limits in characters; chunk_indices yields character offsets
+        splitter = RustTextSplitter(chunk_size, overlap=chunk_overlap)
+        return [
+            Document(page_content=chunk, metadata={**doc.metadata, "start_index": start})
+            for doc in shard
+            for start, chunk in splitter.chunk_indices(doc.page_content)
+        ]
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        length_function=len,
+        add_start_index=True,
+    )
+    return splitter.split_documents(shard)
+
+
+def _rows_to_chunks(df: pd.DataFrame, start_row: int, chunk_size: int, chunk_overlap: int) -> List[Document]:
+    """Rows -> Documents -> chunks for one dataframe slice (runs inside a worker process)."""
+    return _split_shard(dataframe_to_documents(df, start_row), chunk_size, chunk_overlap)
+
+
+def dataframe_to_chunks(df: pd.DataFrame, n_jobs: Optional[int] = None) -> List[Document]:
+    """
+    `chunk_documents(dataframe_to_documents(df))`, in parallel.
+
+    The dataframe is cut into `n_jobs` contiguous row slices (default: one
+    per CPU); each worker process converts its slice to Documents and
+    chunks them, so only the compact dataframe slices are sent to the
+    workers instead of Document objects. The output keeps the row order
+    and `row_index` stays the row position in the full dataframe.
+    """
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(df) < _MIN_DOCS_PER_JOB * 2:
+        return _rows_to_chunks(df, 0, CHUNK_SIZE, CHUNK_OVERLAP)
+
+    n_jobs = min(n_jobs, len(df) // _MIN_DOCS_PER_JOB)
+    shard_size = -(-len(df) // n_jobs)  # ceil division
+
+    chunks = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_rows_to_chunks)(df.iloc[i : i + shard_size], i, CHUNK_SIZE, CHUNK_OVERLAP)
+        for i in range(0, len(df), shard_size)
+    )
+    return list(itertools.chain.from_iterable(chunks))
+
+
+def chunk_documents(documents: List[Document], n_jobs: Optional[int] = None) -> List[Document]:
     """
-    Split documents into overlapping chunks using RecursiveCharacterTextSplitter.
+    Split documents into overlapping chunks using the Rust
+    semantic-text-splitter if installed, else RecursiveCharacterTextSplitter.
 
     - `chunk_size`   controls the max number of characters per chunk.
     - `chunk_overlap` is how many characters are shared between chunks.
     - `add_start_index=True` stores the starting character index of each chunk
       in the metadata under the key "start_index".
+
+    Documents are independent, so they are split in `n_jobs` contiguous
+    shards in parallel worker processes (default: one per CPU); the output
+    keeps the input order.
     """
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=CHUNK_SIZE,
-        chunk_overlap=CHUNK_OVERLAP,
-        length_function=len,
-        add_start_index=True,
-    )
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs == 1 or len(documents) < _MIN_DOCS_PER_JOB * 2:
+        return _split_shard(documents, CHUNK_SIZE, CHUNK_OVERLAP)
+
+    n_jobs = min(n_jobs, len(documents) // _MIN_DOCS_PER_JOB)
+    shard_size = -(-len(documents) // n_jobs)  # ceil division
+    shards = [documents[i : i + shard_size] for i in range(0, len(documents), shard_size)]
 
-    return splitter.split_documents(documents)
+    chunks = Parallel(n_jobs=n_jobs, backend="loky")(
+        delayed(_split_shard)(shard, CHUNK_SIZE, CHUNK_OVERLAP) for shard in shards
+    )
+    return list(itertools.chain.from_iterable(chunks))
 
 
 # ---------------------------------------------------------------------------
@@ -120,38 +255,135 @@ def chunk_documents(documents: List[Document]) -> List[Document]:
 # ---------------------------------------------------------------------------
 
 
+def embed_with_cache(encoder, texts: List[str]):
+    """
+    Embed `texts`, reusing vectors from the on-disk cache in EMBEDDING_CACHE_DIR.
+
+    The cache is a raw VECTOR_DTYPE matrix (read back as a np.memmap) plus a
+    text file with the sha1 of the chunk text of each row, one per line.
+    Only texts whose hash is not cached are encoded; they are appended in
+    slices of CACHE_FLUSH_ROWS (vectors first, then their ids), so an
+    interrupted build keeps the work done so far.
+
+    Returns (matrix, rows): the memmap of all cached vectors and, for each
+    text, the index of its row in that matrix.
+    """
+    dtype = np.dtype(VECTOR_DTYPE)
+    dim = encoder.get_sentence_embedding_dimension()
+    row_bytes = dim * dtype.itemsize
+
+    cache_dir = EMBEDDING_CACHE_DIR / EMBEDDING_MODEL_NAME.replace("/", "__")
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    data_file = cache_dir / f"embeddings.{dtype.name}"
+    ids_file = cache_dir / f"ids.{dtype.name}.txt"
+
+    legacy_ids_file = cache_dir / f"ids.{dtype.name}.json"
+    if legacy_ids_file.exists() and not ids_file.exists():
+        # caches written before the ids file was line-oriented
+        tmp_file = ids_file.with_suffix(".tmp")
+        tmp_file.write_text("".join(h + "\n" for h in json.loads(legacy_ids_file.read_text())))
+        os.replace(tmp_file, ids_file)
+        legacy_ids_file.unlink()
+
+    cached_ids: List[str] = []
+    ids_text = ""
+    if ids_file.exists() and data_file.exists():
+        ids_text = ids_file.read_text()
+        # a trailing line without "\n" was cut off by an interrupted append
+        cached_ids = ids_text.split("\n")[:-1]
+    data_file.touch()
+    # Keep only rows that have both their vector and their id on disk
+    # (either write may be the one an interrupted build did not finish).
+    n_rows = min(len(cached_ids), os.path.getsize(data_file) // row_bytes)
+    del cached_ids[n_rows:]
+    os.truncate(data_file, n_rows * row_bytes)
+    valid_text = "".join(h + "\n" for h in cached_ids)
+    if ids_text != valid_text or not ids_file.exists():
+        tmp_file = ids_file.with_suffix(".tmp")
+        tmp_file.write_text(valid_text)
+        os.replace(tmp_file, ids_file)
+
+    row_of = {h: i for i, h in enumerate(cached_ids)}
+    hashes = [hashlib.sha1(t.encode("utf-8")).hexdigest() for t in texts]
+
+    text_of: Dict[str, str] = {}
+    for h, t in zip(hashes, texts):
+        if h not in row_of:
+            text_of.setdefault(h, t)
+    missing = list(text_of)
+    print(f"Embedding cache: {len(hashes) - len(missing)} chunks cached, {len(missing)} to encode.")
+
+    with open(data_file, "ab") as f, open(ids_file, "a") as ids_out:
+        for i in range(0, len(missing), CACHE_FLUSH_ROWS):
+            part = missing[i : i + CACHE_FLUSH_ROWS]
+            vectors = encoder.encode(
+                [text_of[h] for h in part],
+                batch_size=EMBED_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=True,
+            ).astype(dtype, copy=False)
+            f.write(vectors.tobytes())
+            f.flush()
+
+            # O(slice) per flush: only the new ids are appended
+            ids_out.write("".join(h + "\n" for h in part))
+            ids_out.flush()
+            for h in part:
+                row_of[h] = len(cached_ids)
+                cached_ids.append(h)
+
+    rows = np.fromiter((row_of[h] for h in hashes), dtype=np.int64, count=len(hashes))
+    if not cached_ids:
+        return np.empty((0, dim), dtype=dtype), rows
+    matrix = np.memmap(data_file, dtype=dtype, mode="r", shape=(len(cached_ids), dim))
+    return matrix, rows
+
+
+
 def build_chroma_vectorstore() -> Chroma:
     """
     End-to-end pipeline to build and persist the Chroma DB from scratch:
 
       1. Load dataframe.
-      2. Convert rows -> Documents.
-      3. Chunk Documents.
-      4. Embed and build Chroma DB.
-      5. Persist to disk (via `persist_directory`).
+      2. Convert rows -> Documents and chunk them (parallel workers).
+      3. Embed all chunks in batches (reusing the embedding cache) and add
+         them to a Chroma collection.
+      4. Persist to disk (via `persist_directory`).
 
     This will delete any existing Chroma directory first.
 
-    NOTE: We intentionally do **not** set an explicit `collection_name` here,
-    so Chroma uses its default (currently "langchain"), which matches the DB
-    built in Muhammet's notebook.
+    NOTE: The collection is COLLECTION_NAME ("langchain"), i.e. LangChain's
+    default collection name, which matches the DB built in Muhammet's
+    notebook and what `load_vectorstore()` opens.
     """
     print(f"Loading data from {DATA_PATH} ...")
     df = load_dataframe()
     print(f"Loaded {len(df)} rows.")
 
-    print("Converting rows to Documents ...")
-    raw_docs = dataframe_to_documents(df)
-    print(f"Created {len(raw_docs)} raw Documents.")
-
     print(
-        f"Chunking documents (chunk_size={CHUNK_SIZE}, "
+        f"Converting rows to Documents and chunking them (chunk_size={CHUNK_SIZE}, "
         f"overlap={CHUNK_OVERLAP}) ..."
     )
-    chunked_docs = chunk_documents(raw_docs)
+    chunked_docs = dataframe_to_chunks(df)
     print(f"After chunking: {len(chunked_docs)} chunks.")
 
-    embeddings = get_bge_embeddings()
+    # Embed the chunks on an in-process SentenceTransformer, even with
+    # INFINITY_URL (large batches keep the GPU busy); chunks already in the
+    # embedding cache are skipped.
+    texts = [d.page_content for d in chunked_docs]
+    metadatas = [d.metadata for d in chunked_docs]
+    ids = [str(uuid.uuid4()) for _ in chunked_docs]
+
+    encoder = load_sentence_transformer()
+    if VECTOR_DTYPE == "float16" and encoder.device.type == "cuda":
+        encoder.half()
+
+    # Same newline normalization as HuggingFaceEmbeddings, so the stored
+    # vectors match the query-time embed_query / embed_documents ones.
+    print(f"Embedding {len(texts)} chunks ({VECTOR_DTYPE}) ...")
+    vectors, rows = embed_with_cache(encoder, [t.replace("\n", " ") for t in texts])
+    del encoder
 
     # Remove old DB if it exists
     if CHROMA_DIR.exists():
@@ -159,15 +391,43 @@ def build_chroma_vectorstore() -> Chroma:
         shutil.rmtree(CHROMA_DIR)
 
     print("Building Chroma DB and persisting to disk ...")
-    vectorstore = Chroma.from_documents(
-        documents=chunked_docs,
-        embedding=embeddings,
-        persist_directory=str(CHROMA_DIR),
-        collection_metadata={"hnsw:space": "cosine"},
+    client = chromadb.PersistentClient(path=str(CHROMA_DIR))
+    collection = client.get_or_create_collection(
+        COLLECTION_NAME, metadata=HNSW_METADATA
     )
 
+    # Insert precomputed vectors in large batches (Chroma caps the batch size).
+    # The next batch's vectors are gathered from the memmap and converted to
+    # lists in a helper thread while the current batch is being inserted.
+    add_batch = min(ADD_BATCH_SIZE, client.get_max_batch_size())
+
+    def _batch_vectors(start: int) -> list:
+        return vectors[rows[start : start + add_batch]].astype(np.float32).tolist()
+
+    starts = range(0, len(texts), add_batch)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(_batch_vectors, 0) if len(starts) else None
+        for n, i in enumerate(starts):
+            batch_vectors = pending.result()
+            if n + 1 < len(starts):
+                pending = pool.submit(_batch_vectors, starts[n + 1])
+            collection.add(
+                ids=ids[i : i + add_batch],
+                embeddings=batch_vectors,
+                documents=texts[i : i + add_batch],
+                metadatas=metadatas[i : i + add_batch],
+            )
+            print(f"Inserted {min(i + add_batch, len(texts))}/{len(texts)} chunks.")
+
+    vectorstore = Chroma(
+        client=client,
+        collection_name=COLLECTION_NAME,
+        embedding_function=get_bge_embeddings(),
+    )
+
+    write_document_count(len(texts))
     print("Chroma DB built and stored.")
-    print("Document count:", vectorstore._collection.count())
+    print("Document count:", len(texts))
     return vectorstore
 
 
@@ -176,6 +436,65 @@ def build_chroma_vectorstore() -> Chroma:
 # ---------------------------------------------------------------------------
 
 
+def document_count(vectorstore: Chroma) -> int:
+    """
+    Document count of the DB, from CHROMA_META_PATH if it was recorded
+    (counting once and recording it otherwise).
+    """
+    try:
+        return json.loads(CHROMA_META_PATH.read_text())["count"]
+    except (OSError, ValueError, KeyError):
+        pass
+    count = vectorstore._collection.count()
+    write_document_count(count)
+    return count
+
+
+def write_document_count(count: int) -> None:
+    try:
+        CHROMA_META_PATH.write_text(json.dumps({"count": count}))
+    except OSError:
+        pass  # read-only DB directory: count again next time
+
+
+def unpack_chroma_archive() -> None:
+    """
+    Unpack the distributed Chroma DB into CHROMA_DIR: the tar.zst archive
+    if present (streamed through zstd, no temporary tar file), else the zip.
+    """
+    archive = CHROMA_ARCHIVE_ZST if CHROMA_ARCHIVE_ZST.exists() else CHROMA_ARCHIVE
+    print(f"Unpacking Chroma DB archive {archive} into {CHROMA_DIR} ...")
+    if CHROMA_ARCHIVE_ZST.exists():
+        import tarfile
+        import zstandard
+
+        dctx = zstandard.ZstdDecompressor(max_window_size=2**31)
+        with open(CHROMA_ARCHIVE_ZST, "rb") as fh, dctx.stream_reader(fh) as reader:
+            with tarfile.open(fileobj=reader, mode="r|") as tar:
+                tar.extractall(CHROMA_DIR, filter="data")
+    else:
+        shutil.unpack_archive(str(CHROMA_ARCHIVE), extract_dir=str(CHROMA_DIR), format="zip")
+
+
+def pack_chroma_archive(level: int = 10) -> None:
+    """
+    Write CHROMA_DIR to CHROMA_ARCHIVE_ZST (tar compressed with
+    multi-threaded zstd), for distribution instead of the zip.
+    """
+    import tarfile
+    import zstandard
+
+    print(f"Packing {CHROMA_DIR} into {CHROMA_ARCHIVE_ZST} ...")
+    cctx = zstandard.ZstdCompressor(level=level, threads=-1)
+    with open(CHROMA_ARCHIVE_ZST, "wb") as fh, cctx.stream_writer(fh) as writer:
+        with tarfile.open(fileobj=writer, mode="w|") as tar:
+            for path in sorted(CHROMA_DIR.iterdir()):
+                tar.add(path, arcname=path.name)
+    print("Archive written.")
+
+
+
+
 def build_or_load_vectorstore() -> Chroma:
     """
     Load an existing Chroma vectorstore if possible.
@@ -200,33 +519,34 @@ def build_or_load_vectorstore() -> Chroma:
         vectorstore = Chroma(
             persist_directory=str(CHROMA_DIR),
             embedding_function=embeddings,
-            collection_metadata={"hnsw:space": "cosine"}
+            # HNSW settings (incl. cosine space) are stored with the collection when it
+            # is built; passing a different collection_metadata here would fail.
         )
         print("Vectorstore loaded successfully.")
-        print("Document count:", vectorstore._collection.count())
+        print("Document count:", document_count(vectorstore))
         return vectorstore
 
-    # 2) No directory (or empty), but archive exists → unzip & load
-    if CHROMA_ARCHIVE.exists():
-        print(f"No Chroma directory found, but archive exists at {CHROMA_ARCHIVE}.")
-        print("Unpacking Chroma DB archive into CHROMA_DIR ...")
+    # 2) No directory (or empty), but archive exists → unpack & load
+    if CHROMA_ARCHIVE_ZST.exists() or CHROMA_ARCHIVE.exists():
+        print("No Chroma directory found, but an archive exists.")
 
         # Remove any existing directory (empty / wrong)
         if CHROMA_DIR.exists():
             shutil.rmtree(CHROMA_DIR)
 
         CHROMA_DIR.mkdir(parents=True, exist_ok=True)
-        shutil.unpack_archive(str(CHROMA_ARCHIVE), extract_dir=str(CHROMA_DIR))
+        unpack_chroma_archive()
 
         print("Archive unpacked. Loading vectorstore ...")
         embeddings = get_bge_embeddings()
         vectorstore = Chroma(
             persist_directory=str(CHROMA_DIR),
             embedding_function=embeddings,
-            collection_metadata={"hnsw:space": "cosine"}
+            # HNSW settings (incl. cosine space) are stored with the collection when it
+            # is built; passing a different collection_metadata here would fail.
         )
         print("Vectorstore loaded successfully.")
-        print("Document count:", vectorstore._collection.count())
+        print("Document count:", document_count(vectorstore))
         return vectorstore
 
     # 3) Nothing exists → build from scratch
@@ -5,9 +5,12 @@ Core retrieval + RAG utilities used by notebooks, scripts and chat demos.
 
 Includes:
 - load_vectorstore(): load persisted Chroma DB.
-- retrieve_documents(): one-shot retrieval with optional cross-encoder reranker.
+- retrieve_documents() / aretrieve_documents(): one-shot retrieval with
+  optional cross-encoder reranker (sync / async), LRU-cached per query.
+- retrieve_documents_batch(): the same for several queries at once.
 - retrieve_products(): simple dict-based API for other components.
-- rag_answer(): RAG over the product corpus using a Hugging Face LLM.
+- rag_answer() / rag_answer_from_docs(): RAG over the product corpus using
+  a Hugging Face LLM (retrieving first, or from already retrieved docs).
 - Debug helpers to inspect the vector store.
 - Optional interactive CLI loops (for terminal / notebook use).
 
@@ -15,14 +18,20 @@ All embeddings / LLMs / reranker are from Hugging Face.
 No OpenAI dependency in this module.
 """
 
-from typing import List, Dict, Any, Optional
+import queue
+import asyncio
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple
 
 #from langchain_chroma import Chroma
 from langchain_community.vectorstores import Chroma
 from langchain_core.documents import Document
 
-from .settings import CHROMA_DIR
+from .settings import CHROMA_DIR, RETRIEVAL_CACHE_SIZE, RERANK_SKIP_MARGIN
 from .config import get_bge_embeddings, get_bge_reranker, get_hf_llm
+from ._topk_numba import topk
 
 
 # ---------------------------------------------------------------------------
@@ -58,6 +67,76 @@ def load_vectorstore() -> Chroma:
 
 
 
+# ---------------------------------------------------------------------------
+# Per-request query state
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class QueryContext:
+    """
+    Query of one chat turn + its embedding, computed lazily once.
+
+    Pass the same context to `retrieve_documents` / `rag_answer` so the
+    query is not re-embedded by every step of the turn.
+    """
+
+    query: str
+    embedding: Optional[List[float]] = None
+
+    def get_embedding(self, vs: Chroma) -> List[float]:
+        if self.embedding is None:
+            self.embedding = vs.embeddings.embed_query(self.query)
+        return self.embedding
+
+
+# ---------------------------------------------------------------------------
+# Retrieval result cache
+# ---------------------------------------------------------------------------
+
+# key -> [(page_content, metadata), ...], least recently used first
+_retrieval_cache: "OrderedDict[tuple, List[Tuple[str, Dict[str, Any]]]]" = OrderedDict()
+_retrieval_cache_lock = threading.Lock()
+
+
+def _retrieval_cache_key(
+    query: str, vs: Chroma, k: int, use_reranker: bool, initial_k: Optional[int]
+) -> tuple:
+    # The collection id changes when the DB is rebuilt, which invalidates
+    # old entries; the query is normalized so trivial variants share a hit.
+    normalized = " ".join(query.split()).casefold()
+    return (str(vs._collection.id), normalized, k, use_reranker, initial_k)
+
+
+def _retrieval_cache_get(key: tuple) -> Optional[List[Document]]:
+    if RETRIEVAL_CACHE_SIZE <= 0:
+        return None
+    with _retrieval_cache_lock:
+        hit = _retrieval_cache.get(key)
+        if hit is None:
+            return None
+        _retrieval_cache.move_to_end(key)
+    # fresh Documents: callers may mutate what they get back
+    return [Document(page_content=text, metadata=dict(meta)) for text, meta in hit]
+
+
+def _retrieval_cache_put(key: tuple, docs: List[Document]) -> None:
+    if RETRIEVAL_CACHE_SIZE <= 0:
+        return
+    entry = [(d.page_content, dict(d.metadata)) for d in docs]
+    with _retrieval_cache_lock:
+        _retrieval_cache[key] = entry
+        _retrieval_cache.move_to_end(key)
+        while len(_retrieval_cache) > RETRIEVAL_CACHE_SIZE:
+            _retrieval_cache.popitem(last=False)
+
+
+def clear_retrieval_cache() -> None:
+    """Drop all cached retrieval results."""
+    with _retrieval_cache_lock:
+        _retrieval_cache.clear()
+
+
 # ---------------------------------------------------------------------------
 # Retrieval + reranking
 # ---------------------------------------------------------------------------
@@ -68,29 +147,69 @@ def retrieve_documents(
     k: int = 4,
     use_reranker: bool = False,
     initial_k: Optional[int] = None,
+    ctx: Optional[QueryContext] = None,
 ) -> List[Document]:
     """
     Retrieve top-k documents for `query` from `vs`.
+
+    `ctx` carries the query embedding across calls of the same turn;
+    if omitted, a fresh one is created (one embedding call).
+
+    Results are kept in an LRU cache (RETRIEVAL_CACHE_SIZE entries), so a
+    repeated query skips the embedding, vector search and reranking. If
+    RERANK_SKIP_MARGIN is set, the cross-encoder is also skipped when the
+    vector distances clearly separate the top-k from the rest.
+    """
+    key = _retrieval_cache_key(query, vs, k, use_reranker, initial_k)
+    docs = _retrieval_cache_get(key)
+    if docs is None:
+        docs = _search_documents(query, vs, k, use_reranker, initial_k, ctx)
+        _retrieval_cache_put(key, docs)
+    return docs
+
+
+def _confident_top_k(scored: List[Tuple[Document, float]], k: int) -> Optional[List[Document]]:
+    """
+    The top-k of `scored` ((doc, distance) pairs, nearest first) in vector
+    order if the distance gap after the k-th candidate exceeds
+    RERANK_SKIP_MARGIN; else None.
+
+    This is a heuristic: cross-encoder scores don't depend on the embedding
+    distances, so reranking could still keep or order other docs. Off by
+    default (RERANK_SKIP_MARGIN = inf).
     """
+    if len(scored) <= k:
+        return None
+    if scored[k][1] - scored[k - 1][1] > RERANK_SKIP_MARGIN:
+        return [doc for doc, _ in scored[:k]]
+    return None
+
+
+def _search_documents(
+    query: str,
+    vs: Chroma,
+    k: int,
+    use_reranker: bool,
+    initial_k: Optional[int],
+    ctx: Optional[QueryContext],
+) -> List[Document]:
+    if ctx is None:
+        ctx = QueryContext(query)
 
     if not use_reranker:
-        retriever = vs.as_retriever(
-            search_type="similarity",
-            search_kwargs={"k": k},
-        )
-        docs = retriever.invoke(query)  # returns list[Document]
-        return docs
+        return vs.similarity_search_by_vector(ctx.get_embedding(vs), k=k)
 
     # Two-stage retrieval: vector search, then cross-encoder reranking.
     if initial_k is None:
         initial_k = max(k * 4, k + 8)
 
-    base_retriever = vs.as_retriever(
-        search_type="similarity",
-        search_kwargs={"k": initial_k},
-    )
-    candidate_docs = base_retriever.invoke(query)  # list[Document]
+    scored = vs.similarity_search_by_vector_with_relevance_scores(ctx.get_embedding(vs), k=initial_k)
 
+    confident = _confident_top_k(scored, k)
+    if confident is not None:
+        return confident
+
+    candidate_docs = [doc for doc, _ in scored]
     if not candidate_docs:
         return []
 
@@ -98,12 +217,123 @@ def retrieve_documents(
     texts = [d.page_content for d in candidate_docs]
     scores = reranker.score(query, texts)  # list[float]
 
-    # Pair and sort by score descending
-    pairs = list(zip(candidate_docs, scores))
-    pairs.sort(key=lambda t: t[1], reverse=True)
+    # Indices of the k best scores, best first (no full sort of all candidates)
+    return [candidate_docs[i] for i in topk(scores, k)]
+
 
-    reranked_docs = [doc for doc, _ in pairs[:k]]
-    return reranked_docs
+async def aretrieve_documents(
+    query: str,
+    vs: Chroma,
+    k: int = 4,
+    use_reranker: bool = False,
+    initial_k: Optional[int] = None,
+    ctx: Optional[QueryContext] = None,
+) -> List[Document]:
+    """
+    Async version of `retrieve_documents` (shares its result cache).
+
+    The embedding, the vector search and the cross-encoder run in worker
+    threads, so the event loop keeps serving other requests meanwhile.
+    """
+    key = _retrieval_cache_key(query, vs, k, use_reranker, initial_k)
+    docs = _retrieval_cache_get(key)
+    if docs is None:
+        docs = await _asearch_documents(query, vs, k, use_reranker, initial_k, ctx)
+        _retrieval_cache_put(key, docs)
+    return docs
+
+
+async def _asearch_documents(
+    query: str,
+    vs: Chroma,
+    k: int,
+    use_reranker: bool,
+    initial_k: Optional[int],
+    ctx: Optional[QueryContext],
+) -> List[Document]:
+    if ctx is None:
+        ctx = QueryContext(query)
+
+    embedding = await asyncio.to_thread(ctx.get_embedding, vs)
+
+    if not use_reranker:
+        return await vs.asimilarity_search_by_vector(embedding, k=k)
+
+    if initial_k is None:
+        initial_k = max(k * 4, k + 8)
+
+    scored = await asyncio.to_thread(
+        vs.similarity_search_by_vector_with_relevance_scores, embedding, k=initial_k
+    )
+
+    confident = _confident_top_k(scored, k)
+    if confident is not None:
+        return confident
+
+    candidate_docs = [doc for doc, _ in scored]
+    if not candidate_docs:
+        return []
+
+    reranker = await asyncio.to_thread(get_bge_reranker)
+    texts = [d.page_content for d in candidate_docs]
+    scores = await asyncio.to_thread(reranker.score, query, texts)
+
+    return [candidate_docs[i] for i in topk(scores, k)]
+
+
+def retrieve_documents_batch(
+    queries: List[str],
+    vs: Chroma,
+    k: int = 4,
+    use_reranker: bool = False,
+    initial_k: Optional[int] = None,
+    query_embeddings: Optional[List[List[float]]] = None,
+) -> List[List[Document]]:
+    """
+    Retrieve top-k documents for several queries at once.
+
+    All queries are embedded with one encoder call (unless the caller
+    already has their `query_embeddings`) and sent to Chroma as one
+    multi-query request; with the reranker, the candidates of all queries
+    are scored in one cross-encoder call.
+    """
+    if not queries:
+        return []
+
+    n_results = k
+    if use_reranker:
+        n_results = initial_k if initial_k is not None else max(k * 4, k + 8)
+
+    if query_embeddings is None:
+        query_embeddings = vs.embeddings.embed_documents(list(queries))
+    res = vs._collection.query(
+        query_embeddings=query_embeddings,
+        n_results=n_results,
+        include=["documents", "metadatas"],
+    )
+
+    results: List[List[Document]] = [
+        [
+            Document(page_content=text, metadata=metadata or {})
+            for text, metadata in zip(texts, metadatas)
+        ]
+        for texts, metadatas in zip(res["documents"], res["metadatas"])
+    ]
+
+    if not use_reranker:
+        return results
+
+    pairs = [(q, d.page_content) for q, cands in zip(queries, results) for d in cands]
+    scores = get_bge_reranker().score_pairs(pairs)
+
+    # split the scores back per query and keep each query's top-k
+    offset = 0
+    for i, cands in enumerate(results):
+        own = scores[offset : offset + len(cands)]
+        offset += len(cands)
+        results[i] = [cands[j] for j in topk(own, k)]
+
+    return results
 
 
 # ---------------------------------------------------------------------------
@@ -191,29 +421,13 @@ def summarize_retrieved_products(
 # ---------------------------------------------------------------------------
 
 
-def rag_answer(
-    query: str,
-    vs: Optional[Chroma] = None,
-    k: int = 4,
-    use_reranker: bool = True,
-) -> str:
-    """
-    Retrieve top-k documents and ask an LLM to answer using the context.
+_NOTHING_FOUND = "I couldn't find anything relevant in the product database."
 
-    If the answer is not in the context, the LLM is instructed to say it
-    doesn't know.
-    """
-    if vs is None:
-        vs = load_vectorstore()
-
-    docs = retrieve_documents(query, vs, k=k, use_reranker=use_reranker)
 
-    if not docs:
-        return "I couldn't find anything relevant in the product database."
-
-    context = "\n\n---\n\n".join(doc.page_content for doc in docs[:k])
+def _build_rag_prompt(query: str, docs: List[Document]) -> str:
+    context = "\n\n---\n\n".join(doc.page_content for doc in docs)
 
-    prompt = """
+    return """
 Use ONLY the following product information to answer the question.
 If the answer is not in the context, say you don't know.
 
@@ -226,10 +440,51 @@ QUESTION:
 ANSWER:
 """.strip().format(context=context, query=query)
 
-    llm = get_llm()
-    response = llm.invoke(prompt)
-    # HuggingFacePipeline.invoke usually returns a string.
-    return response
+
+def rag_answer_from_docs(query: str, docs: List[Document]) -> str:
+    """
+    Ask the LLM to answer `query` using already retrieved `docs` as context.
+
+    If the answer is not in the context, the LLM is instructed to say it
+    doesn't know.
+    """
+    if not docs:
+        return _NOTHING_FOUND
+
+    llm = get_hf_llm()
+    response = llm.invoke(_build_rag_prompt(query, docs))
+    # HuggingFacePipeline.invoke returns a string, ChatOpenAI (vLLM) a message.
+    return getattr(response, "content", response)
+
+
+async def arag_answer_from_docs(query: str, docs: List[Document]) -> str:
+    """Async version of `rag_answer_from_docs` (uses `llm.ainvoke`)."""
+    if not docs:
+        return _NOTHING_FOUND
+
+    llm = await asyncio.to_thread(get_hf_llm)
+    response = await llm.ainvoke(_build_rag_prompt(query, docs))
+    return getattr(response, "content", response)
+
+
+def rag_answer(
+    query: str,
+    vs: Optional[Chroma] = None,
+    k: int = 4,
+    use_reranker: bool = True,
+    ctx: Optional[QueryContext] = None,
+) -> str:
+    """
+    Retrieve top-k documents and ask an LLM to answer using the context.
+
+    Pass `ctx` to reuse an already computed query embedding. If the docs
+    are already retrieved, call `rag_answer_from_docs` directly.
+    """
+    if vs is None:
+        vs = load_vectorstore()
+
+    docs = retrieve_documents(query, vs, k=k, use_reranker=use_reranker, ctx=ctx)
+    return rag_answer_from_docs(query, docs[:k])
 
 
 # ---------------------------------------------------------------------------
@@ -281,12 +536,16 @@ def print_product_card(doc: Document) -> None:
 
 def preview_vectorstore(vs: Chroma, k: int = 5) -> None:
     """
-    Retrieve k documents with a dummy query and print their metadata + snippet.
+    Print the metadata + snippet of k documents from the vector store.
 
     This is useful just to sanity-check what ended up in the vector store.
+    Records are sampled with `peek`, so nothing is embedded or searched.
     """
-    retriever = vs.as_retriever(search_kwargs={"k": k})
-    docs = retriever.invoke(" ")
+    sample = vs._collection.peek(k)
+    docs = [
+        Document(page_content=text, metadata=metadata or {})
+        for text, metadata in zip(sample["documents"], sample["metadatas"])
+    ]
 
     print(f"Got {len(docs)} documents from vectorstore.\n")
     for i, doc in enumerate(docs, start=1):
@@ -300,6 +559,32 @@ def preview_vectorstore(vs: Chroma, k: int = 5) -> None:
         print("\n" + "-" * 70 + "\n")
 
 
+# (collection name, embedding model, query) -> embedding, least recently used first
+_debug_embeddings: "OrderedDict[tuple, List[float]]" = OrderedDict()
+_DEBUG_EMBEDDINGS_SIZE = 128
+
+
+def _embed_query_cached(vs: Chroma, query: str) -> List[float]:
+    """
+    Query embedding for the debug helpers, computed once per query.
+
+    Keyed on the collection name and embedding model rather than the
+    store object, so no Chroma instance is kept alive by the cache and a
+    different model never gets a stale vector.
+    """
+    embeddings = vs.embeddings
+    model = getattr(embeddings, "model_name", None) or getattr(embeddings, "model", None)
+    key = (vs._collection.name, model, query)
+    embedding = _debug_embeddings.get(key)
+    if embedding is None:
+        embedding = _debug_embeddings[key] = embeddings.embed_query(query)
+        if len(_debug_embeddings) > _DEBUG_EMBEDDINGS_SIZE:
+            _debug_embeddings.popitem(last=False)
+    else:
+        _debug_embeddings.move_to_end(key)
+    return embedding
+
+
 def debug_similarity_search_with_scores(
     vs: Chroma,
     query: str,
@@ -308,7 +593,8 @@ def debug_similarity_search_with_scores(
     """
     Low-level peek into Chroma: print (doc, score) pairs for a query.
     """
-    results = vs.similarity_search_with_score(query=query, k=k)
+    embedding = _embed_query_cached(vs, query)
+    results = vs.similarity_search_by_vector_with_relevance_scores(embedding, k=k)
     print(f"Got {len(results)} results for query: {query!r}\n")
 
     for i, (doc, score) in enumerate(results, start=1):
@@ -325,7 +611,8 @@ def debug_single_retrieval(
     """
     For Jupyter: run a single retrieval for a hardcoded query and print cards.
     """
-    docs = retrieve_documents(query, vs, k=k, use_reranker=use_reranker)
+    ctx = QueryContext(query, _embed_query_cached(vs, query))
+    docs = retrieve_documents(query, vs, k=k, use_reranker=use_reranker, ctx=ctx)
     print(f"\nRetrieved {len(docs)} documents for query: {query!r}")
     print(f"Reranker enabled: {use_reranker}\n")
 
@@ -352,36 +639,66 @@ def debug_single_rag(
 # ---------------------------------------------------------------------------
 
 
+def _read_queries(pending: "queue.Queue[Optional[str]]") -> None:
+    """Feed stdin lines into `pending`; None marks the end of the input."""
+    while True:
+        try:
+            pending.put(input())
+        except EOFError:
+            pending.put(None)
+            return
+
+
 def interactive_retrieval_chat(vs: Chroma, use_reranker: bool = True) -> None:
     """
     Semantic product search with optional reranking; prints product cards.
 
+    Input lines are read by a background thread into a queue; every query
+    that is pending when the previous batch finishes (e.g. several pasted
+    lines) is retrieved together with `retrieve_documents_batch`.
+
     This is *just* for terminal / notebook quick tests.
     """
     print("Semantic Product Search — type 'exit' to stop.\n")
     print(f"Reranker enabled: {use_reranker}\n")
 
-    while True:
-        query = input("You: ").strip()
+    pending: "queue.Queue[Optional[str]]" = queue.Queue()
+    threading.Thread(target=_read_queries, args=(pending,), daemon=True).start()
 
-        if query.lower() in {"exit", "quit"}:
+    while True:
+        print("You: ", end="", flush=True)
+        lines = [pending.get()]
+        while True:
+            try:
+                lines.append(pending.get_nowait())
+            except queue.Empty:
+                break
+
+        queries: List[str] = []
+        stop = False
+        for line in lines:
+            if line is None or line.strip().lower() in {"exit", "quit"}:
+                stop = True
+                break
+            if line.strip():
+                queries.append(line.strip())
+
+        for query, docs in zip(
+            queries, retrieve_documents_batch(queries, vs, k=3, use_reranker=use_reranker)
+        ):
+            if not docs:
+                print(f"Bot: Sorry, I found nothing for {query!r}.\n")
+                continue
+
+            print(f"\nBot: I found {len(docs)} related products for {query!r}:\n")
+            for doc in docs:
+                print_product_card(doc)
+            print()
+
+        if stop:
             print("\nBot: Goodbye 👋")
             break
 
-        if not query:
-            continue
-
-        docs = retrieve_documents(query, vs, k=3, use_reranker=use_reranker)
-
-        if not docs:
-            print("Bot: Sorry, I found nothing.\n")
-            continue
-
-        print(f"\nBot: I found {len(docs)} related products:\n")
-        for doc in docs:
-            print_product_card(doc)
-        print()
-
 
 def interactive_rag_chat(vs: Chroma, use_reranker: bool = True) -> None:
     """
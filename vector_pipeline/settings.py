@@ -4,14 +4,18 @@ settings.py
 Central configuration for paths and chunking parameters used by
 the vector pipeline (ingestion + retrieval).
 """
+import os
 from pathlib import Path
 
 # Directory: .../PROJECT-25-2-SCRUM-TEAM-DATA/vector_pipeline
 _THIS_DIR = Path(__file__).resolve().parent
 PROJECT_ROOT: Path = _THIS_DIR.parent
 
-# Path to the preprocessed dataframe with a `combined_text` column.
-DATA_PATH: Path = PROJECT_ROOT / "data" / "processed_product.pkl"
+# Path to the preprocessed dataframe with a `combined_text` column (Parquet).
+DATA_PATH: Path = PROJECT_ROOT / "data" / "processed_product.parquet"
+
+# Legacy pickle of the same dataframe; converted to DATA_PATH on first load.
+DATA_PICKLE_PATH: Path = PROJECT_ROOT / "data" / "processed_product.pkl"
 
 # Where to persist the Chroma DB.
 CHROMA_DIR: Path = PROJECT_ROOT / "chroma_db"
@@ -19,9 +23,36 @@ CHROMA_DIR: Path = PROJECT_ROOT / "chroma_db"
 # Optional: zipped Chroma DB archive (for distribution via Git).
 CHROMA_ARCHIVE: Path = PROJECT_ROOT / "chroma_db.zip"
 
+# Small JSON file next to the Chroma DB with its document count, so loads
+# don't have to run a COUNT over the collection just to log it.
+CHROMA_META_PATH: Path = CHROMA_DIR / "_meta.json"
+
+# Optional: zstd-compressed tar of the Chroma DB; unpacks much faster than
+# the zip and is preferred when present.
+CHROMA_ARCHIVE_ZST: Path = PROJECT_ROOT / "chroma_db.tar.zst"
+
 # Column that contains the full combined text for each product.
 COMBINED_TEXT_COLUMN: str = "combined_text"
 
+# Metadata stored with every chunk in Chroma (plus row_index / start_index).
+# Chroma keeps metadata per vector, so anything not listed here is left out
+# of the DB; these are the fields the prompts and product cards use.
+METADATA_COLUMNS: list = [
+    "product_id",
+    "title",
+    "product_name",
+    "store",
+    "price",
+    "rating",
+    "rating_count",
+    "color",
+]
+
+# Columns loaded from DATA_PATH: the text column + METADATA_COLUMNS
+# (everything else in the file is never read; listed columns missing from
+# the file are skipped).
+WANTED_COLUMNS: list = [COMBINED_TEXT_COLUMN, *METADATA_COLUMNS]
+
 # Name for the Chroma collection (arbitrary, but stable).
 COLLECTION_NAME: str = "langchain"
 
@@ -29,16 +60,93 @@ COLLECTION_NAME: str = "langchain"
 CHUNK_SIZE: int = 1500
 CHUNK_OVERLAP: int = 100
 
+# HNSW index settings, applied when the collection is built.
+# Cosine space for the normalized BGE vectors; higher construction_ef / M
+# for better graph quality (one-time cost), moderate search_ef for latency.
+HNSW_METADATA: dict = {
+    "hnsw:space": "cosine",
+    "hnsw:construction_ef": 400,
+    "hnsw:M": 32,
+    "hnsw:search_ef": 64,
+    "hnsw:num_threads": os.cpu_count() or 1,
+}
+
+# dtype of the embedding matrix while building the DB ("float32" or
+# "float16"). float16 halves the peak memory of the build (the encoder
+# always runs in half precision on GPU); Chroma's HNSW index itself always
+# stores float32, so query-time results are unaffected by the storage.
+VECTOR_DTYPE: str = os.environ.get("VECTOR_DTYPE", "float32")
+
+# On-disk cache of chunk embeddings for the DB build, keyed by a hash of the
+# chunk text (one subdirectory per embedding model): rebuilds and resumed
+# builds only encode chunks that are not cached yet.
+EMBEDDING_CACHE_DIR: Path = PROJECT_ROOT / "data" / "embedding_cache"
+
+# Opt-in latency shortcut: skip the cross-encoder when the cosine-distance
+# gap between the k-th and (k+1)-th vector candidate is larger than this and
+# return the top-k in vector order. This trades quality for speed (the
+# reranker may still have picked or ordered other docs), so it is off
+# ("inf") by default; e.g. RERANK_SKIP_MARGIN=0.1 enables it.
+RERANK_SKIP_MARGIN: float = float(os.environ.get("RERANK_SKIP_MARGIN", "inf"))
+
+# Retrieval results (query, k, reranker flag -> docs) kept in an in-process
+# LRU cache by vector_pipeline.retrieval; 0 disables the cache.
+RETRIEVAL_CACHE_SIZE: int = int(os.environ.get("RETRIEVAL_CACHE_SIZE", "512"))
+
+# Semantic answer cache (run_chat in api_wrapper_lg): a separate Chroma
+# collection of past first-turn queries; a new query whose cosine similarity
+# to a cached one is >= the threshold reuses its answer. Kept outside
+# CHROMA_DIR, so it is neither packed into the archive nor removed by a
+# rebuild. Entries older than QUERY_CACHE_TTL_S are ignored, and the oldest
+# ones are evicted once there are more than QUERY_CACHE_MAX_ENTRIES.
+QUERY_CACHE_DIR: Path = PROJECT_ROOT / "data" / "query_cache"
+QUERY_CACHE_THRESHOLD: float = float(os.environ.get("QUERY_CACHE_THRESHOLD", "0.95"))
+QUERY_CACHE_TTL_S: float = float(os.environ.get("QUERY_CACHE_TTL_S", str(7 * 24 * 3600)))
+QUERY_CACHE_MAX_ENTRIES: int = int(os.environ.get("QUERY_CACHE_MAX_ENTRIES", "10000"))
+
 # Embedding model (bi-encoder)
 EMBEDDING_MODEL_NAME: str = "BAAI/bge-base-en-v1.5"
 
+# Base URL of an Infinity embedding server serving EMBEDDING_MODEL_NAME,
+# e.g. http://localhost:7997. When set, query embeddings are computed by
+# that server (dynamic batching, fp16) instead of an in-process model:
+#   infinity_emb v2 --model-id BAAI/bge-base-en-v1.5 --port 7997
+INFINITY_URL = os.environ.get("INFINITY_URL")
+
+# Encoder batch size for embedding many texts (DB build, embed_documents);
+# large batches keep the GPU busy.
+EMBED_BATCH_SIZE: int = 256
+
 # Cross-encoder reranker model
 RERANKER_MODEL_NAME: str = "BAAI/bge-reranker-base"
 
+# Reranker runtime: "torch", "onnx" (ONNX Runtime: int8 on CPU, CUDA
+# provider on GPU) or "auto" (FP16 torch on GPU, int8 ONNX on CPU if
+# optimum is installed).
+RERANKER_BACKEND: str = os.environ.get("RERANKER_BACKEND", "auto")
+
+# Where the exported + quantized ONNX reranker is cached.
+RERANKER_ONNX_DIR: Path = PROJECT_ROOT / "models" / "reranker_onnx"
+
+# Compile the in-process PyTorch reranker and LLM with torch.compile
+# (fused Inductor kernels). Off by default: the first calls after start-up
+# are slow while the graphs compile.
+TORCH_COMPILE: bool = os.environ.get("TORCH_COMPILE", "0") == "1"
+
 # LLM model for RAG
 #LLM_MODEL_NAME: str = "HuggingFaceH4/zephyr-7b-beta"
 LLM_MODEL_NAME = "sshleifer/tiny-gpt2"
 
+# Base URL of an OpenAI-compatible vLLM / TGI server serving LLM_MODEL_NAME,
+# e.g. http://localhost:8001. When set, the LLM is used through that server
+# (continuous batching, paged KV cache) instead of an in-process pipeline:
+#   python -m vllm.entrypoints.openai.api_server --model HuggingFaceH4/zephyr-7b-beta \
+#       --dtype float16 --max-model-len 4096 --port 8001
+VLLM_URL = os.environ.get("VLLM_URL")
+
+# Model name the vLLM / TGI server serves (defaults to LLM_MODEL_NAME).
+VLLM_MODEL: str = os.environ.get("VLLM_MODEL", LLM_MODEL_NAME)
+
 CLOUD_LLM_MODEL_NAME: str = "google/gemma-3-27b-it:free",
 
 # Path to OpenRouter API key